@@ -19,6 +19,8 @@ import os
 import bpy
 import bpy.utils.previews
 import bmesh
+from . import eland_live, eland_background
+from .eland_modal import ModalExport
 
 #-------------------------------------------------------------------------------------------------------------------------------
 from bpy.props import(
@@ -38,7 +40,7 @@ from bpy_extras.io_utils import(
 #-------------------------------------------------------------------------------------------------------------------------------
 # EIF Exporter
 #-------------------------------------------------------------------------------------------------------------------------------
-class ExportEIF(bpy.types.Operator, ExportHelper):
+class ExportEIF(bpy.types.Operator, ExportHelper, ModalExport):
     """Save a static 3ds Max Euroland file, for scenes and entities"""
 
     bl_idname = "export_scene.eif"
@@ -95,6 +97,32 @@ class ExportEIF(bpy.types.Operator, ExportHelper):
         description="Export per-material face shader rules in FACESHADERS and add S to FACEFORMAT. Needed for EuroLand blend modes such as alpha.",
         default=True,
     ) # type: ignore
+
+    Serialize_Processes: IntProperty(
+        name="Processes",
+        description="Format the mesh blocks in this many background processes. 1 keeps everything inside Blender, 0 uses one per CPU core.",
+        min=0,
+        max=256,
+        default=1,
+    ) # type: ignore
+
+    Use_Fragment_Cache : BoolProperty(
+        name="Reuse Cached Blocks",
+        description="Keep the formatted mesh blocks on disk and reuse them when the same mesh is exported again with the same options. Speeds up re-exports where only a few objects changed",
+        default=False,
+    ) # type: ignore
+
+    Modal_Export : BoolProperty(
+        name="Keep Blender Responsive",
+        description="Export in small steps while Blender keeps redrawing and shows the progress in the status bar. Press Esc to cancel, which puts the frame and mode back and deletes the unfinished file",
+        default=False,
+    ) # type: ignore
+
+    Background_Export : BoolProperty(
+        name="Export in Background",
+        description="Save a copy of this file and export it from a separate Blender running in the background, so you can keep working meanwhile. A popup tells when it is done",
+        default=False,
+    ) # type: ignore
 
     #-------------------------------------------------------------------------------------------------------------------------------
     # Precision
@@ -132,8 +160,16 @@ class ExportEIF(bpy.types.Operator, ExportHelper):
                                             "check_existing",
                                             "filter_glob",
                                             "path_mode",
+                                            "Modal_Export",
+                                            "Background_Export",
                                         ))
 
+        if self.Background_Export:
+            return eland_background.start(self, 'eif_export', keywords)
+
+        if self.Modal_Export:
+            return self.start_modal(context, eif_export.export_steps(context, **keywords), self.filepath)
+
         return eif_export.save(context, **keywords)
 
     def draw(self, context):
@@ -152,6 +188,8 @@ class EIF_EXPORT_PT_Output_Settings(bpy.types.Panel):
 
     def draw(self, context):
         self.layout.prop(context.space_data.active_operator, 'Transform_Center')
+        self.layout.prop(context.space_data.active_operator, 'Modal_Export')
+        self.layout.prop(context.space_data.active_operator, 'Background_Export')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class EIF_EXPORT_PT_Mesh_Options(bpy.types.Panel):
@@ -168,6 +206,8 @@ class EIF_EXPORT_PT_Mesh_Options(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_UV')
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Vertex_Colors')
         self.layout.prop(context.space_data.active_operator, 'Output_Face_Shaders')
+        self.layout.prop(context.space_data.active_operator, 'Serialize_Processes')
+        self.layout.prop(context.space_data.active_operator, 'Use_Fragment_Cache')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class EIF_EXPORT_PT_Decimals_Precision(bpy.types.Panel):
@@ -200,7 +240,7 @@ class EIF_EXPORT_PT_Scale_Output(bpy.types.Panel):
 #-------------------------------------------------------------------------------------------------------------------------------
 # ESE Exporter
 #-------------------------------------------------------------------------------------------------------------------------------
-class ExportESE(bpy.types.Operator, ExportHelper):
+class ExportESE(bpy.types.Operator, ExportHelper, ModalExport):
     """Save a dynamic 3ds Max Euroland file; for cutscenes and maps"""
 
     bl_idname = "export_scene.ese"
@@ -404,6 +444,56 @@ class ExportESE(bpy.types.Operator, ExportHelper):
         max=1000,
         default=1,
     ) # type: ignore
+
+    Reduce_Keys: BoolProperty(
+        name="Reduce Keys",
+        description="Drop sampled transform keys that can be rebuilt by blending their neighbours within the error limits below. Useful to shrink baked or force-sampled animations.",
+        default=False,
+    ) # type: ignore
+
+    Reduce_Position_Error: FloatProperty(
+        name="Position Error",
+        description="Largest distance a dropped key may deviate from the blended neighbours; also used for scale.",
+        min=0.0,
+        max=1000.0,
+        default=0.001,
+        precision=4,
+    ) # type: ignore
+
+    Reduce_Rotation_Error: FloatProperty(
+        name="Rotation Error",
+        description="Largest angle, in degrees, a dropped key may deviate from the blended neighbours.",
+        min=0.0,
+        max=180.0,
+        default=0.1,
+        precision=3,
+    ) # type: ignore
+
+    Serialize_Processes: IntProperty(
+        name="Processes",
+        description="Format the mesh blocks in this many background processes. 1 keeps everything inside Blender, 0 uses one per CPU core.",
+        min=0,
+        max=256,
+        default=1,
+    ) # type: ignore
+
+    Use_Fragment_Cache : BoolProperty(
+        name="Reuse Cached Blocks",
+        description="Keep the formatted mesh blocks on disk and reuse them when the same mesh is exported again with the same options. Speeds up re-exports where only a few objects changed",
+        default=False,
+    ) # type: ignore
+
+    Modal_Export : BoolProperty(
+        name="Keep Blender Responsive",
+        description="Export in small steps while Blender keeps redrawing and shows the progress in the status bar. Press Esc to cancel, which puts the frame and mode back and deletes the unfinished file",
+        default=False,
+    ) # type: ignore
+
+    Background_Export : BoolProperty(
+        name="Export in Background",
+        description="Save a copy of this file and export it from a separate Blender running in the background, so you can keep working meanwhile. A popup tells when it is done",
+        default=False,
+    ) # type: ignore
 
     #-------------------------------------------------------------------------------------------------------------------------------
     path_mode: path_reference_mode
@@ -434,8 +524,16 @@ class ExportESE(bpy.types.Operator, ExportHelper):
                                             "check_existing",
                                             "filter_glob",
                                             "path_mode",
+                                            "Modal_Export",
+                                            "Background_Export",
                                             ))
 
+        if self.Background_Export:
+            return eland_background.start(self, 'ese_export', keywords)
+
+        if self.Modal_Export:
+            return self.start_modal(context, ese_export.export_steps(context, **keywords), self.filepath)
+
         return ese_export.save(context, **keywords)
 
     def draw(self, context):
@@ -462,6 +560,8 @@ class ESE_EXPORT_PT_Output_Options(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Output_CameraLightAnims')
         self.layout.prop(context.space_data.active_operator, 'Output_Remove_NonUniform_Scale')
         self.layout.prop(context.space_data.active_operator, 'Transform_Center')
+        self.layout.prop(context.space_data.active_operator, 'Modal_Export')
+        self.layout.prop(context.space_data.active_operator, 'Background_Export')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class ESE_EXPORT_PT_Object_Types(bpy.types.Panel):
@@ -493,6 +593,8 @@ class ESE_EXPORT_PT_Mesh_Options(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_UV')
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Vertex_Colors')
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Morph')
+        self.layout.prop(context.space_data.active_operator, 'Serialize_Processes')
+        self.layout.prop(context.space_data.active_operator, 'Use_Fragment_Cache')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class ESE_EXPORT_PT_Static_Output(bpy.types.Panel):
@@ -551,6 +653,9 @@ class ESE_EXPORT_PT_Controller_Output(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Use_Keys')
         self.layout.prop(context.space_data.active_operator, 'Force_Sample')
         self.layout.prop(context.space_data.active_operator, 'Frames_Per_Sample')
+        self.layout.prop(context.space_data.active_operator, 'Reduce_Keys')
+        self.layout.prop(context.space_data.active_operator, 'Reduce_Position_Error')
+        self.layout.prop(context.space_data.active_operator, 'Reduce_Rotation_Error')
         self.layout.prop(context.space_data.active_operator, 'Enable_Start_From_Frame')
         self.layout.prop(context.space_data.active_operator, 'Start_From_Frame')
         self.layout.prop(context.space_data.active_operator, 'Enable_End_With_Frame')
@@ -560,7 +665,7 @@ class ESE_EXPORT_PT_Controller_Output(bpy.types.Panel):
 #-------------------------------------------------------------------------------------------------------------------------------
 # RTG Exporter
 #-------------------------------------------------------------------------------------------------------------------------------
-class ExportRTG(bpy.types.Operator, ExportHelper):
+class ExportRTG(bpy.types.Operator, ExportHelper, ModalExport):
     """Save a dynamic Maya Euroland file; for animations, scripts and maps"""
 
     bl_idname = "export_scene.rtg"
@@ -714,6 +819,44 @@ class ExportRTG(bpy.types.Operator, ExportHelper):
         default=False,
     ) # type: ignore
 
+    Skip_Static_Nodes : BoolProperty(
+        name="Skip Static Nodes",
+        description="Only write the nodes that never move in the first scene frame",
+        default=False,
+    ) # type: ignore
+
+    Low_Memory : BoolProperty(
+        name="Low Memory",
+        description="Evaluate, write and free the meshes one at a time instead of keeping all of them until the end. Slower on scenes with many linked duplicates",
+        default=False,
+    ) # type: ignore
+
+    Serialize_Processes: IntProperty(
+        name="Processes",
+        description="Format the mesh blocks in this many background processes. 1 keeps everything inside Blender, 0 uses one per CPU core.",
+        min=0,
+        max=256,
+        default=1,
+    ) # type: ignore
+
+    Use_Fragment_Cache : BoolProperty(
+        name="Reuse Cached Blocks",
+        description="Keep the formatted mesh blocks on disk and reuse them when the same mesh is exported again with the same options. Speeds up re-exports where only a few objects changed",
+        default=False,
+    ) # type: ignore
+
+    Modal_Export : BoolProperty(
+        name="Keep Blender Responsive",
+        description="Export in small steps while Blender keeps redrawing and shows the progress in the status bar. Press Esc to cancel, which puts the frame and mode back and deletes the unfinished file",
+        default=False,
+    ) # type: ignore
+
+    Background_Export : BoolProperty(
+        name="Export in Background",
+        description="Save a copy of this file and export it from a separate Blender running in the background, so you can keep working meanwhile. A popup tells when it is done",
+        default=False,
+    ) # type: ignore
+
     #-------------------------------------------------------------------------------------------------------------------------------
     path_mode: path_reference_mode
     check_extension = True
@@ -743,8 +886,16 @@ class ExportRTG(bpy.types.Operator, ExportHelper):
                                             "check_existing",
                                             "filter_glob",
                                             "path_mode",
+                                            "Modal_Export",
+                                            "Background_Export",
                                             ))
 
+        if self.Background_Export:
+            return eland_background.start(self, 'rtg_export', keywords)
+
+        if self.Modal_Export:
+            return self.start_modal(context, rtg_export.export_steps(context, **keywords), self.filepath)
+
         return rtg_export.save(context, **keywords)
 
     #-------------------------------------------------------------------------------------------------------------------------------
@@ -768,6 +919,8 @@ class RTG_EXPORT_PT_Output_Options(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Anims')
         self.layout.prop(context.space_data.active_operator, 'Output_CameraLightAnims')
         self.layout.prop(context.space_data.active_operator, 'Transform_Center')
+        self.layout.prop(context.space_data.active_operator, 'Modal_Export')
+        self.layout.prop(context.space_data.active_operator, 'Background_Export')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class RTG_EXPORT_PT_Object_Types(bpy.types.Panel):
@@ -799,6 +952,9 @@ class RTG_EXPORT_PT_Mesh_Options(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_UV')
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Vertex_Colors')
         self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Morph')
+        self.layout.prop(context.space_data.active_operator, 'Low_Memory')
+        self.layout.prop(context.space_data.active_operator, 'Serialize_Processes')
+        self.layout.prop(context.space_data.active_operator, 'Use_Fragment_Cache')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 class RTG_EXPORT_PT_Static_Output(bpy.types.Panel):
@@ -859,6 +1015,203 @@ class RTG_EXPORT_PT_Controller_Output(bpy.types.Panel):
         self.layout.prop(context.space_data.active_operator, 'Enable_End_With_Frame')
         self.layout.prop(context.space_data.active_operator, 'End_With_Frame')
         self.layout.prop(context.space_data.active_operator, 'Output_First_Only')
+        self.layout.prop(context.space_data.active_operator, 'Skip_Static_Nodes')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# Combined Exporter
+#-------------------------------------------------------------------------------------------------------------------------------
+class ExportEuroland(bpy.types.Operator, ExportHelper):
+    """Save the scene as EIF, ESE and RTG files at once, evaluating and sampling it only one time"""
+
+    bl_idname = "export_scene.euroland"
+    bl_label = 'Export EIF/ESE/RTG'
+    bl_options = {'PRESET'}
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    filename_ext = ""
+    filter_glob: StringProperty(
+                    default="*.eif;*.ese;*.rtg",
+                    options={'HIDDEN'}
+                ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Output Formats
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Formats: EnumProperty(
+        name="Formats",
+        options={'ENUM_FLAG'},
+        items=(('EIF', "EIF", "Eurocom Interchange File, for the map compiler"),
+               ('ESE', "ESE", "Eurocom Scene Export, for cutscenes and maps"),
+               ('RTG', "RTG", "Eurocom Real Time Game, for animations and scripts")
+            ),
+        description="Which files to write; each one gets the chosen file name with its own extension.",
+        default={'EIF', 'ESE', 'RTG'}
+    ) # type: ignore
+
+    Object_Types: EnumProperty(
+        name="Output Types",
+        options={'ENUM_FLAG'},
+        items=(('MESH', "Geometric", ""),
+               ('SHAPE', "Shapes", ""),
+               ('CAMERA', "Cameras", ""),
+               ('LIGHT', "Lights", ""),
+               ('ARMATURE', "Armature Bones", ""),
+               ('HELPER', "Helpers", "")
+            ),
+        description="Which kind of object to export to the ESE and RTG files; EIF files only contain meshes.",
+        default={'MESH'}
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Output Options
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Output_Materials: BoolProperty(
+        name="Materials",
+        description="Output scene materials.",
+        default=True,
+    ) # type: ignore
+
+    Output_Mesh_Anims: BoolProperty(
+        name="Animated Mesh",
+        description="Export mesh animations",
+        default=False,
+    ) # type: ignore
+
+    Output_CameraLightAnims: BoolProperty(
+        name="Animated Camera/Light settings",
+        description="Export animations from Camera and Light object types.",
+        default=False,
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Mesh Options
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Output_Mesh_Normals : BoolProperty(
+        name="Mesh Normals",
+        description="Export mesh normals",
+        default=True,
+    ) # type: ignore
+
+    Output_Mesh_UV : BoolProperty(
+        name="Mapping Coordinates",
+        description="Export mesh UVs",
+        default=True,
+    ) # type: ignore
+
+    Output_Mesh_Vertex_Colors : BoolProperty(
+        name="Vertex Colors",
+        description="Export mesh vertex colors",
+        default=False,
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Static Output
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Static_Frame: IntProperty(
+        name="Frame #",
+        min=0,
+        max=2147483647,
+        default=1,
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Precision
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Decimal_Precision: IntProperty(
+        name="Decimals:",
+        min=1,
+        max=10,
+        default=6,
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    # Scale
+    #-------------------------------------------------------------------------------------------------------------------------------
+    Output_Scale: FloatProperty(
+        name="Scale Factor",
+        min=0.01,
+        max=1000.0,
+        default=1.0,
+    )# type: ignore
+
+    Background_Export : BoolProperty(
+        name="Export in Background",
+        description="Save a copy of this file and export it from a separate Blender running in the background, so you can keep working meanwhile. A popup tells when it is done",
+        default=False,
+    ) # type: ignore
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    path_mode: path_reference_mode
+    check_extension = False
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def execute(self, context):
+        from . import eland_export
+
+        frame_start = bpy.context.scene.frame_start
+        frame_end = bpy.context.scene.frame_end
+
+        # Set the first frame
+        if self.Static_Frame < frame_start:
+            self.Static_Frame = frame_start
+        if self.Static_Frame > frame_end:
+            self.Static_Frame = frame_end
+
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "global_scale",
+                                            "check_existing",
+                                            "filter_glob",
+                                            "path_mode",
+                                            "Background_Export",
+                                            ))
+
+        if self.Background_Export:
+            return eland_background.start(self, 'eland_export', keywords)
+
+        return eland_export.save(context, **keywords)
+
+    #-------------------------------------------------------------------------------------------------------------------------------
+    def draw(self, context):
+        pass
+
+#-------------------------------------------------------------------------------------------------------------------------------
+class ELAND_EXPORT_PT_Output_Options(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOL_PROPS'
+    bl_label = "Output Options"
+    bl_parent_id = "FILE_PT_operator"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.active_operator.bl_idname == "EXPORT_SCENE_OT_euroland"
+
+    def draw(self, context):
+        self.layout.prop(context.space_data.active_operator, 'Formats')
+        self.layout.prop(context.space_data.active_operator, 'Object_Types')
+        self.layout.prop(context.space_data.active_operator, 'Output_Materials')
+        self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Anims')
+        self.layout.prop(context.space_data.active_operator, 'Output_CameraLightAnims')
+        self.layout.prop(context.space_data.active_operator, 'Background_Export')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+class ELAND_EXPORT_PT_Mesh_Options(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOL_PROPS'
+    bl_label = "Mesh Options"
+    bl_parent_id = "FILE_PT_operator"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.active_operator.bl_idname == "EXPORT_SCENE_OT_euroland"
+
+    def draw(self, context):
+        self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Normals')
+        self.layout.prop(context.space_data.active_operator, 'Output_Mesh_UV')
+        self.layout.prop(context.space_data.active_operator, 'Output_Mesh_Vertex_Colors')
+        self.layout.prop(context.space_data.active_operator, 'Static_Frame')
+        self.layout.prop(context.space_data.active_operator, 'Decimal_Precision')
+        self.layout.prop(context.space_data.active_operator, 'Output_Scale')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------------------------------------------------------
@@ -930,6 +1283,26 @@ class EuroProperties(bpy.types.PropertyGroup):
         description="Enable or disable the camera script",
         default=False
     )
+
+    # swy: live export; see eland_live.py
+    live_export: bpy.props.BoolProperty(
+        name="Live Export",
+        description="Write the target file again a moment after any object changes, so that the game preview can pick it up. Uses the options last picked in the export dialog of that format; only the changed objects get evaluated and formatted again",
+        default=False,
+        update=eland_live.update_live_export
+    )
+    live_export_path: bpy.props.StringProperty(
+        name="Target File",
+        description="File that gets kept up to date while Live Export is on",
+        subtype='FILE_PATH',
+        default=""
+    )
+    live_export_format: bpy.props.EnumProperty(
+        name="Format",
+        items=(('ESE', "ESE", "Eurocom Scene Export"),
+               ('EIF', "EIF", "Eurocom Interchange File")),
+        default='ESE'
+    )
     
     ''' Per-face bitfield for Euroland entities. '''
     face_flags: bpy.props.EnumProperty(
@@ -1170,6 +1543,27 @@ class SCENE_PT_camera_script_panel(bpy.types.Panel):
         # Añadimos la propiedad al panel
         row.prop(scene_props, "enable_camera_script")
 
+#-------------------------------------------------------------------------------------------------------------------------------
+class SCENE_PT_live_export_panel(bpy.types.Panel):
+    bl_label = "Eurocom Live Export"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'scene'
+
+    def draw_header(self, context):
+        self.layout.prop(context.scene.euro_properties, "live_export", text="")
+
+    def draw(self, context):
+        scene_props = context.scene.euro_properties
+
+        col = self.layout.column()
+        col.active = scene_props.live_export
+        col.prop(scene_props, "live_export_path")
+        col.prop(scene_props, "live_export_format")
+
+        if eland_live.status:
+            col.label(text=eland_live.status)
+
 #-------------------------------------------------------------------------------------------------------------------------------
 class TOOLS_PANEL_PT_eurocom(bpy.types.Panel):
     bl_label = 'Eurocom Tools'
@@ -1229,6 +1623,57 @@ class TOOLS_PANEL_PT_eurocom(bpy.types.Panel):
             for line in text_list:
                 text_row.label(text=(' ' * 6) + line)
         
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: where the exporters keep the mesh blocks they can reuse between runs (see eland_cache.py)
+#-------------------------------------------------------------------------------------------------------------------------------
+class EClearFragmentCache(bpy.types.Operator):
+    """Delete every mesh block kept in the fragment cache"""
+    bl_idname  = "wm.eland_clear_fragment_cache"
+    bl_label   = "Clear Fragment Cache"
+
+    def execute(self, context):
+        from .eland_cache import clear_cache
+
+        prefs = context.preferences.addons[__name__].preferences
+        clear_cache(bpy.path.abspath(prefs.cache_directory) or None)
+
+        self.report({'INFO'}, "Cleared the fragment cache")
+        return {'FINISHED'}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+class ElandPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    cache_directory : StringProperty(
+        name="Cache Directory",
+        description="Folder for the mesh blocks the exporters keep when Reuse Cached Blocks is on. Leave it empty to use the temporary folder of the system",
+        subtype='DIR_PATH',
+        default="",
+    ) # type: ignore
+
+    cache_budget : IntProperty(
+        name="Cache Size (MB)",
+        description="Once the cache grows past this size, the blocks that have gone unused for the longest get deleted after each export",
+        min=1,
+        default=1024,
+    ) # type: ignore
+
+    def draw(self, context):
+        from .eland_cache import cache_stats, fragment_cache_directory
+
+        directory = bpy.path.abspath(self.cache_directory) or fragment_cache_directory()
+        entries, size, hits, misses = cache_stats(directory)
+
+        layout = self.layout
+        layout.prop(self, 'cache_directory')
+        layout.prop(self, 'cache_budget')
+
+        box = layout.box()
+        box.label(text="Folder: %s" % directory)
+        box.label(text="%u blocks, %.1f MB" % (entries, size / (1024 * 1024)))
+        box.label(text="%u hits, %u misses" % (hits, misses))
+        box.operator(EClearFragmentCache.bl_idname, icon='TRASH')
+
 #-------------------------------------------------------------------------------------------------------------------------------
 # swy: global variable to store icons in
 #-------------------------------------------------------------------------------------------------------------------------------
@@ -1248,6 +1693,8 @@ def menu_func_ese_export(self, context):
     self.layout.operator(ExportESE.bl_idname, icon_value=sphinx_ico(), text='Eurocom Scene Export (.ese)')
 def menu_func_rtg_export(self, context):
     self.layout.operator(ExportRTG.bl_idname, icon_value=sphinx_ico(), text='Eurocom Real Time Game (.rtg)')
+def menu_func_eland_export(self, context):
+    self.layout.operator(ExportEuroland.bl_idname, icon_value=sphinx_ico(), text='Eurocom EIF/ESE/RTG (.eif, .ese, .rtg)')
 
 #-------------------------------------------------------------------------------------------------------------------------------
 # swy: un/register the whole thing in one go, see below
@@ -1256,6 +1703,7 @@ classes = (
     ExportEIF,
     ExportESE,
     ExportRTG,
+    ExportEuroland,
 
     #EIF Panels
     EIF_EXPORT_PT_Output_Settings,
@@ -1280,20 +1728,31 @@ classes = (
     RTG_EXPORT_PT_Decimals_Precision,
     RTG_EXPORT_PT_Scale_Output,
     RTG_EXPORT_PT_Controller_Output,
+
+    #Combined Panels
+    ELAND_EXPORT_PT_Output_Options,
+    ELAND_EXPORT_PT_Mesh_Options,
     
     # jmarti856: script camera stuff
     SCENE_PT_camera_script_panel,
 
+    # swy: live export stuff
+    SCENE_PT_live_export_panel,
+
     # swy: mesh flags panel stuff
     TOOLS_PANEL_PT_eurocom,
     EApplyFlags,
     ESelectChFlags,
     ESelectNoFlags,
 
+    # swy: fragment cache preferences
+    EClearFragmentCache,
+    ElandPreferences,
+
     EuroProperties
 )
 
-menu_export = (menu_func_eif_export, menu_func_ese_export, menu_func_rtg_export)
+menu_export = (menu_func_eif_export, menu_func_ese_export, menu_func_rtg_export, menu_func_eland_export)
 
 #-------------------------------------------------------------------------------------------------------------------------------
 # swy: initialize and de-initialize in opposite order
@@ -1318,9 +1777,13 @@ def register():
 
     bpy.app.handlers.depsgraph_update_post.append(scene_update_post_handler)
     bpy.app.handlers.depsgraph_update_post.append(update_camera_script_property)
+    eland_live.register()
 
 #-------------------------------------------------------------------------------------------------------------------------------
 def unregister():
+    eland_live.unregister()
+    eland_background.unregister()
+
     if scene_update_post_handler in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(scene_update_post_handler)
         bpy.app.handlers.depsgraph_update_post.remove(update_camera_script_property)
@@ -0,0 +1,307 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+EIF text writer; turns a SceneModel filled in by eif_export into the actual file contents, without touching bpy.
+"""
+
+import numpy as np
+from datetime import datetime
+from .eland_format import *
+from .eland_model import *
+from .eland_parallel import write_section
+
+#-------------------------------------------------------------------------------------------------------------------------------
+EXPORT_TRI = False
+TEXTURE_VERTEX_COLOR_SCALE = 0.5
+
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def face_layer_count(uv_layers, mesh_color_layers, has_materials, EXPORT_UV, EXPORT_VERTEX_COLORS, EXPORT_FACE_SHADERS):
+    layer_count = max(
+        len(uv_layers) if EXPORT_UV else 0,
+        len(mesh_color_layers) if EXPORT_VERTEX_COLORS else 0,
+        1 if has_materials or EXPORT_FACE_SHADERS else 0
+    )
+    return max(1, layer_count)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: one *MESH block; materials holds the MaterialRecord of every slot and material_indices where each of
+#      them landed in the global *MATERIALS list
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_mesh(out, name, geometry, export_matrix, materials, material_indices,
+               EXPORT_UV,
+               EXPORT_VERTEX_COLORS,
+               EXPORT_FACE_SHADERS,
+               DECIMAL_PRECISION
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+    flip = np.linalg.det(export_matrix[:3, :3]) < 0.0
+
+    face_offsets, face_loops, face_polygons = geometry.face_corners(EXPORT_TRI, flip)
+    unique_vertices = geometry.placed_vertices(export_matrix)
+    loop_vertices = geometry.vertex_remap[geometry.loop_vertices][face_loops].tolist()
+
+    uv_layers = list(range(len(geometry.uv_rows))) if EXPORT_UV else []
+    unique_uvs, uv_layer_indices = geometry.unique_uvs(uv_layers, flip)
+    uv_layer_indices = uv_layer_indices[:, face_loops].tolist()
+
+    mesh_color_layers = geometry.corner_color_layers() if EXPORT_VERTEX_COLORS else []
+    unique_colors, color_layer_indices = geometry.unique_colors(mesh_color_layers, flip)
+    color_layer_indices = color_layer_indices[:, face_loops].tolist()
+
+    has_materials = bool(materials)
+    synthesize_texture_color = not len(unique_colors) and any(record.texture for record in materials)
+    if synthesize_texture_color:
+        unique_colors = np.array([(TEXTURE_VERTEX_COLOR_SCALE, TEXTURE_VERTEX_COLOR_SCALE, TEXTURE_VERTEX_COLOR_SCALE, 1.0)])
+    has_face_shaders = EXPORT_FACE_SHADERS and has_materials
+    layer_count = face_layer_count(uv_layers, mesh_color_layers, has_materials, EXPORT_UV, EXPORT_VERTEX_COLORS, EXPORT_FACE_SHADERS)
+    if synthesize_texture_color:
+        layer_count = max(layer_count, 1)
+
+    faceformat = 'V'
+    if uv_layers and len(unique_uvs):
+        faceformat += 'T'
+    if (mesh_color_layers or synthesize_texture_color) and len(unique_colors):
+        faceformat += 'C'
+    if has_materials:
+        faceformat += 'M'
+    if has_face_shaders:
+        faceformat += 'S'
+    faceformat += 'F'
+
+    out.write("*MESH {\n")
+    out.write('\t*NAME "%s"\n' % name)
+    out.write('\t*VERTCOUNT %d\n' % len(unique_vertices))
+    out.write('\t*UVCOUNT %d\n' % len(unique_uvs))
+    out.write('\t*VERTCOLCOUNT %d\n' % len(unique_colors))
+    face_corner_counts = np.diff(face_offsets)
+    out.write('\t*FACECOUNT %d\n' % len(face_corner_counts))
+    out.write('\t*TRIFACECOUNT %d\n' % (face_corner_counts - 2).sum())
+    out.write('\t*FACELAYERSCOUNT %d\n' % layer_count)
+    if has_face_shaders:
+        out.write('\t*FACESHADERCOUNT %d\n' % len(materials))
+
+    out.write('\t*VERTEX_LIST {\n')
+    write_rows(out, f'\t\t{df} {df} {df}\n', unique_vertices)
+    out.write('\t}\n')
+
+    if EXPORT_UV:
+        out.write('\t*UV_LIST {\n')
+        write_rows(out, f'\t\t{df} {df}\n', unique_uvs * (1.0, -1.0))
+        out.write('\t}\n')
+
+    if EXPORT_VERTEX_COLORS or synthesize_texture_color:
+        out.write('\t*VERTCOL_LIST {\n')
+        write_rows(out, f'\t\t{df} {df} {df} {df}\n', unique_colors)
+        out.write('\t}\n')
+
+    if has_face_shaders:
+        out.write('\t*FACESHADERS {\n')
+        for shader_index, record in enumerate(materials):
+            material_global_index = material_indices[shader_index]
+            out.write('\t\t*SHADER %d {\n' % shader_index)
+            out.write('\t\t\t%d\t%s\n' % (material_global_index, record.shader_rule('shader')))
+            out.write('\t\t}\n')
+        out.write('\t}\n')
+
+    out.write('\t*FACEFORMAT %s\n' % faceformat)
+    out.write("\t*FACE_LIST {\n")
+
+    poly_material_indices = geometry.material_indices[face_polygons].tolist()
+    if geometry.face_flags is not None:
+        flag_values = geometry.face_flags[face_polygons].tolist()
+    else:
+        flag_values = [0] * len(face_polygons)
+
+    face_lines = []
+    offsets = face_offsets.tolist()
+    for poly_index, (first_loop, last_loop) in enumerate(zip(offsets[:-1], offsets[1:])):
+        corners = slice(first_loop, last_loop)
+        corner_count = last_loop - first_loop
+        face_items = [str(corner_count), *map(str, loop_vertices[corners])]
+
+        if uv_layers and len(unique_uvs):
+            for layer_index in range(layer_count):
+                if layer_index < len(uv_layers):
+                    face_items.extend(map(str, uv_layer_indices[layer_index][corners]))
+                else:
+                    face_items.extend(["-1"] * corner_count)
+
+        if (mesh_color_layers or synthesize_texture_color) and len(unique_colors):
+            for layer_index in range(layer_count):
+                if synthesize_texture_color:
+                    face_items.extend(["0"] * corner_count)
+                elif layer_index < len(mesh_color_layers):
+                    face_items.extend(map(str, color_layer_indices[layer_index][corners]))
+                else:
+                    face_items.extend(["-1"] * corner_count)
+
+        poly_material_index = poly_material_indices[poly_index]
+
+        if has_materials:
+            material_index = material_indices[poly_material_index] if poly_material_index < len(material_indices) else material_indices[0]
+            face_items.extend(str(material_index if layer_index == 0 else -1) for layer_index in range(layer_count))
+
+        if has_face_shaders:
+            face_items.append(str(poly_material_index if poly_material_index < len(materials) else 0))
+
+        face_items.append(str(flag_values[poly_index]))
+        face_lines.append("\t\t%s\n" % " ".join(face_items))
+
+    write_lines(out, face_lines)
+
+    out.write("\t}\n")
+    out.write("}\n\n")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the whole file, as a generator that yields (meshes done, mesh count) after every *MESH; when out is a
+#      SectionWriter the caller can drain it in between, and a modal export can show how far along it is
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_steps(out, model,
+                EXPORT_GEOMNODE,
+                EXPORT_PLACENODE,
+                EXPORT_UV,
+                EXPORT_VERTEX_COLORS,
+                EXPORT_FACE_SHADERS,
+                DECIMAL_PRECISION
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+    SCENE_LIGHT_SCALE = 1.0
+    TEXTURED_DIFFUSE_SCALE = 1.0
+    SOLID_DIFFUSE_SCALE = 1.0
+    MAP_AMOUNT_SCALE = 1.0
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def material_map_amount(record):
+        return record.metallic if record.metallic != 0.0 else 1.0
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    # swy: empty slots and materials called "Default" end up sharing the same entry, like they always did
+    #---------------------------------------------------------------------------------------------------------------------------
+    def collect_materials():
+        materials = []
+        index_map = {}
+
+        for record in model.materials.values():
+            if record.name not in index_map:
+                index_map[record.name] = len(materials)
+                materials.append(record)
+
+        return materials, index_map
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_scene_data(out):
+        export_amb = scaled_color(model.ambient, SCENE_LIGHT_SCALE)
+
+        out.write("*SCENE {\n")
+        out.write('\t*FILENAME "%s"\n' % model.filepath)
+        out.write('\t*FIRSTFRAME %s\n' % model.frame_start)
+        out.write('\t*LASTFRAME %s\n' % model.frame_end)
+        out.write('\t*FRAMESPEED %s\n' % model.fps)
+        out.write('\t*STATICFRAME %s\n' % model.frame_current)
+        out.write(f'\t*AMBIENTSTATIC {df} {df} {df}\n' % export_amb)
+        out.write("}\n\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_materials(out, materials):
+        out.write('*MATERIALS {\n')
+
+        for index, record in enumerate(materials):
+            export_diffuse = (
+                (TEXTURED_DIFFUSE_SCALE, TEXTURED_DIFFUSE_SCALE, TEXTURED_DIFFUSE_SCALE)
+                if record.texture
+                else scaled_color(record.color, SOLID_DIFFUSE_SCALE)
+            )
+
+            out.write('\t*MATERIAL %d {\n' % index)
+            out.write('\t\t*NAME "%s"\n' % record.name)
+            out.write(f'\t\t*COL_DIFFUSE {df} {df} {df}\n' % export_diffuse)
+
+            if record.texture:
+                out.write('\t\t*MAP_DIFFUSE "%s"\n' % record.texture)
+                out.write('\t\t*MAP_DIFFUSE_AMOUNT %.2f\n' % (material_map_amount(record) * MAP_AMOUNT_SCALE))
+
+            if record.has_alpha():
+                out.write('\t\t*MAP_HASALPHA\n')
+
+            if record.twosided:
+                out.write('\t\t*TWOSIDED\n')
+
+            out.write('\t}\n')
+
+        out.write('}\n\n')
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    # swy: the node transforms come precomputed as 3x3 rows, position, ZXY euler angles in degrees and scale
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_geom_and_place_node(out, nodes, is_geom_node=False):
+        for node in nodes:
+            if is_geom_node:
+                transform = node.transforms['GEOMNODE'].tolist()
+                out.write('*GEOMNODE {\n')
+            else:
+                transform = node.transforms['PLACENODE'].tolist()
+                out.write('*PLACENODE {\n')
+
+            out.write('\t*NAME "%s"\n' % node.name)
+            out.write('\t*MESH "%s"\n' % node.name)
+            out.write('\t*WORLD_TM {\n')
+            out.write(f'\t\t*TMROW0 {df} {df} {df} {df}\n' % (*transform[0:3], 0))
+            out.write(f'\t\t*TMROW1 {df} {df} {df} {df}\n' % (*transform[3:6], 0))
+            out.write(f'\t\t*TMROW2 {df} {df} {df} {df}\n' % (*transform[6:9], 0))
+            out.write(f'\t\t*TMROW3 {df} {df} {df} {df}\n' % (*transform[9:12], 1))
+            out.write(f'\t\t*POS {df} {df} {df}\n' % tuple(transform[9:12]))
+            out.write(f'\t\t*ROT: {df} {df} {df}\n' % tuple(transform[12:15]))
+            out.write(f'\t\t*SCL {df} {df} {df}\n' % tuple(transform[15:18]))
+            out.write('\t}\n')
+
+            if is_geom_node:
+                out.write('\t*USER_FLAGS_COUNT %u\n' % 1)
+                out.write('\t*USER_FLAGS {\n')
+                out.write('\t\t*SET 0 0x00000000\n')
+                out.write('\t}\n')
+
+            out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    out.write("*EUROCOM_INTERCHANGE_FILE 100\n")
+    out.write('*COMMENT Eurocom Interchange File Version 1.00 %s\n' % datetime.now().strftime("%A %B %d %Y %H:%M"))
+    out.write('*COMMENT Version of eif-plugin that wrote this file %d.%d\n' % (model.plugin_version[0], model.plugin_version[1]))
+    out.write('*COMMENT Version of blender that wrote this file %s\n\n' % model.blender_version)
+    out.write("*OPTIONS {\n")
+    out.write("\t*COORD_SYSTEM LH\n")
+    out.write("}\n\n")
+
+    materials, material_indices = collect_materials()
+    meshes = model.nodes_of_type('MESH')
+
+    write_scene_data(out)
+    write_materials(out, materials)
+    for done, node in enumerate(meshes, start=1):
+        write_section(
+            out, write_mesh, node.name, node.geometry, node.transforms['MESH'],
+            [model.material(name) for name in node.materials],
+            [material_indices.get(name if name else "Default", -1) for name in node.materials],
+            EXPORT_UV=EXPORT_UV,
+            EXPORT_VERTEX_COLORS=EXPORT_VERTEX_COLORS,
+            EXPORT_FACE_SHADERS=EXPORT_FACE_SHADERS,
+            DECIMAL_PRECISION=DECIMAL_PRECISION
+        )
+        yield done, len(meshes)
+
+    # swy: instances of the same object share one node entry, placed where the last one of them is
+    placed = list({node.name: node for node in meshes}.values())
+
+    if EXPORT_GEOMNODE:
+        write_geom_and_place_node(out, placed, True)
+
+    if EXPORT_PLACENODE:
+        write_geom_and_place_node(out, placed)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write(out, model, **options):
+    for _ in write_steps(out, model, **options):
+        pass
@@ -0,0 +1,110 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Background exports; saves a copy of the open file and runs the exporter on it in a separate, headless
+Blender (see eland_headless.py), so the artist can keep working while it writes. A timer keeps an eye on
+the running jobs and tells how they went once they are done.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+import bpy
+
+#-------------------------------------------------------------------------------------------------------------------------------
+POLL_SECONDS = 1.0
+HEADLESS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eland_headless.py")
+
+jobs = []
+
+#-------------------------------------------------------------------------------------------------------------------------------
+class BackgroundJob:
+    def __init__(self, exporter, keywords):
+        self.filepath = keywords["filepath"]
+        self.directory = tempfile.mkdtemp(prefix="eland_export_")
+        self.log_path = os.path.join(self.directory, "export.log")
+
+        # swy: copy=True leaves the open file (and its path) alone; relative paths get remapped to the copy
+        blend_path = os.path.join(self.directory, "scene.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, check_existing=False)
+
+        job_path = os.path.join(self.directory, "job.json")
+        with open(job_path, 'w', encoding="utf8") as job_file:
+            json.dump({
+                "exporter": exporter,
+                "keywords": {key: sorted(value) if isinstance(value, set) else value for key, value in keywords.items()},
+                "sets": [key for key, value in keywords.items() if isinstance(value, set)],
+            }, job_file)
+
+        with open(self.log_path, 'w', encoding="utf8") as log:
+            self.process = subprocess.Popen(
+                [bpy.app.binary_path, '-b', blend_path, '--python-exit-code', '1',
+                 '--python', HEADLESS_SCRIPT, '--', __package__, job_path],
+                stdout=log, stderr=subprocess.STDOUT
+            )
+
+    def last_log_line(self):
+        try:
+            with open(self.log_path, 'r', encoding="utf8", errors='replace') as log:
+                lines = [line.strip() for line in log if line.strip()]
+            return lines[-1] if lines else ""
+        except OSError:
+            return ""
+
+    def finish(self):
+        if self.process.returncode == 0:
+            show_result("Background export finished", "Exported %s" % self.filepath, 'CHECKMARK')
+        else:
+            show_result("Background export failed", self.last_log_line() or self.filepath, 'ERROR')
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: timers run without a window in the context, so borrow the first one for the popup
+#-------------------------------------------------------------------------------------------------------------------------------
+def show_result(title, message, icon):
+    print("%s: %s" % (title, message))
+
+    wm = bpy.context.window_manager
+    if not wm.windows:
+        return
+
+    def draw(self, context):
+        self.layout.label(text=message)
+
+    with bpy.context.temp_override(window=wm.windows[0]):
+        wm.popup_menu(draw, title=title, icon=icon)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def poll_jobs():
+    for job in [job for job in jobs if job.process.poll() is not None]:
+        jobs.remove(job)
+        job.finish()
+    return POLL_SECONDS if jobs else None
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: what the export operators call instead of running the exporter themselves; exporter is the name of
+#      the module whose save() the background Blender should run, keywords what the operator would pass to it
+#-------------------------------------------------------------------------------------------------------------------------------
+def start(operator, exporter, keywords):
+    try:
+        jobs.append(BackgroundJob(exporter, keywords))
+    except (OSError, RuntimeError) as error:
+        operator.report({'ERROR'}, "Can't start the background export: %s" % error)
+        return {'CANCELLED'}
+
+    if not bpy.app.timers.is_registered(poll_jobs):
+        bpy.app.timers.register(poll_jobs, first_interval=POLL_SECONDS)
+
+    operator.report({'INFO'}, "Exporting %s in the background" % os.path.basename(keywords["filepath"]))
+    return {'FINISHED'}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: running exports are left to finish on their own, there is just nobody around to tell about it
+#-------------------------------------------------------------------------------------------------------------------------------
+def unregister():
+    if bpy.app.timers.is_registered(poll_jobs):
+        bpy.app.timers.unregister(poll_jobs)
+    jobs.clear()
@@ -0,0 +1,180 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+On-disk cache of formatted file sections; a section is keyed by a hash of everything its writer gets (arrays,
+records, options) and of the writer code itself, so re-exporting a scene only formats what actually changed.
+The directory keeps an index with the size and last use of every entry, and gets trimmed down to a byte budget
+by throwing away the least recently used ones.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+#-------------------------------------------------------------------------------------------------------------------------------
+INDEX_NAME = "index.json"
+DEFAULT_BUDGET = 1024 * 1024 * 1024
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def fragment_cache_directory():
+    return os.path.join(tempfile.gettempdir(), "eland_fragments")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the index maps every key to its [size in bytes, last access time], plus the lifetime hit/miss counters;
+#      a missing or broken index just means an empty cache
+#-------------------------------------------------------------------------------------------------------------------------------
+def read_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_NAME), 'r', encoding="utf8") as index_file:
+            index = json.load(index_file)
+        return dict(index["entries"]), int(index["hits"]), int(index["misses"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}, 0, 0
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_index(directory, entries, hits, misses):
+    path = os.path.join(directory, INDEX_NAME)
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    os.makedirs(directory, exist_ok=True)
+    with open(temp_path, 'w', encoding="utf8") as index_file:
+        json.dump({"entries": entries, "hits": hits, "misses": misses}, index_file)
+    os.replace(temp_path, path)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: what the preferences show; (entry count, total bytes, hits, misses)
+#-------------------------------------------------------------------------------------------------------------------------------
+def cache_stats(directory=None):
+    entries, hits, misses = read_index(directory or fragment_cache_directory())
+    return len(entries), sum(size for size, _ in entries.values()), hits, misses
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def clear_cache(directory=None):
+    shutil.rmtree(directory or fragment_cache_directory(), ignore_errors=True)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: feeds a value into the hash with a type tag in front of everything, so that e.g. (1, 2) and [1, 2] or
+#      an int and a float holding the same number do not end up with the same key
+#-------------------------------------------------------------------------------------------------------------------------------
+def hash_value(digest, value, memo):
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update(b'A%s%r' % (value.dtype.str.encode(), value.shape))
+        digest.update(memoryview(value).cast('B'))
+    elif isinstance(value, np.generic):
+        hash_value(digest, value.item(), memo)
+    elif value is None or isinstance(value, (bool, int, float, str, bytes)):
+        digest.update(b'V%s' % repr(value).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'L%d' % len(value))
+        for item in value:
+            hash_value(digest, item, memo)
+    elif isinstance(value, dict):
+        digest.update(b'D%d' % len(value))
+        for key in sorted(value, key=repr):
+            hash_value(digest, key, memo)
+            hash_value(digest, value[key], memo)
+    elif hasattr(type(value), '__slots__'):
+        # swy: big records (like the geometry shared by every instance of a mesh) only get hashed once
+        if id(value) not in memo:
+            record = hashlib.blake2b(type(value).__qualname__.encode(), digest_size=20)
+            derived = getattr(value, 'derived_slots', ())
+            for name in type(value).__slots__:
+                if name not in derived:
+                    hash_value(record, getattr(value, name), memo)
+            memo[id(value)] = (value, record.digest())
+        digest.update(b'R%s' % memo[id(value)][1])
+    else:
+        raise TypeError("can't hash a %s for the fragment cache" % type(value).__name__)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+class FragmentCache:
+    MODULES = ('eland_format', 'eland_model')
+
+    def __init__(self, directory=None, budget=DEFAULT_BUDGET):
+        self.directory = directory or fragment_cache_directory()
+        self.budget = budget
+        self.code_digests = {}
+        self.memo = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+
+    # swy: any change to the writer module or the shared helpers it formats with invalidates its fragments
+    def code_digest(self, writer):
+        if writer.__module__ not in self.code_digests:
+            digest = hashlib.blake2b(writer.__module__.encode(), digest_size=20)
+            modules = [writer.__module__] + ['%s.%s' % (__package__, name) for name in self.MODULES]
+            for module_name in modules:
+                with open(sys.modules[module_name].__file__, 'rb') as source:
+                    digest.update(source.read())
+            self.code_digests[writer.__module__] = digest.digest()
+        return self.code_digests[writer.__module__]
+
+    def key(self, writer, args, kwargs):
+        digest = hashlib.blake2b(self.code_digest(writer), digest_size=20)
+        digest.update(writer.__qualname__.encode())
+        hash_value(digest, (args, kwargs), self.memo)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.txt')
+
+    def load(self, key):
+        try:
+            with open(self.path(key), 'r', encoding="utf8", newline='') as fragment:
+                text = fragment.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.used[key] = [len(text.encode("utf8")), time.time()]
+        return text
+
+    # swy: the cache is only there to save time, so failing to store a fragment is never an export error;
+    #      write to a temporary name first, so a crashed export can't leave half a fragment behind
+    def store(self, key, text):
+        path = self.path(key)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'w', encoding="utf8", newline='') as fragment:
+                fragment.write(text)
+            os.replace(temp_path, path)
+            self.used[key] = [os.path.getsize(path), time.time()]
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    # swy: merge what this export touched into the index, which other exports may have updated in the
+    #      meantime, and evict the least recently used entries until everything fits in the budget again
+    def commit(self):
+        entries, hits, misses = read_index(self.directory)
+        entries.update(self.used)
+
+        total = sum(size for size, _ in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key][1]):
+            if total <= self.budget:
+                break
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            total -= entries.pop(key)[0]
+
+        try:
+            write_index(self.directory, entries, hits + self.hits, misses + self.misses)
+        except OSError:
+            pass
+
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,125 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Name: 'Eurocom EIF/ESE/RTG'
+Blender: 4.3.2
+Group: 'Export'
+Tooltip: 'Export the same scene to several EuroLand formats in one go'
+Authors: Swyter and Jmarti856
+"""
+
+import os
+import bpy
+from pathlib import Path
+from .eland_utils import *
+from . import eif_export, ese_export, rtg_export
+
+#-------------------------------------------------------------------------------------------------------------------------------
+ESE_OBJECT_TYPES = {'MESH', 'SHAPE', 'CAMERA', 'LIGHT', 'ARMATURE', 'HELPER'}
+RTG_OBJECT_TYPES = {'MESH', 'CAMERA', 'LIGHT', 'ARMATURE'}
+
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: every format gets the same export session, so the scene is only indexed, evaluated, triangulated and
+#      sampled once; the serializers still run one after the other, they read from bpy and Blender's data
+#      is not safe to touch from other threads
+#-------------------------------------------------------------------------------------------------------------------------------
+def save(context,
+         filepath,
+         *,
+         Formats,
+         Object_Types,
+         Output_Materials,
+         Output_Mesh_Anims,
+         Output_CameraLightAnims,
+         Output_Mesh_Normals,
+         Output_Mesh_UV,
+         Output_Mesh_Vertex_Colors,
+         Static_Frame,
+         Decimal_Precision,
+         Output_Scale,
+         Use_Fragment_Cache=False):
+
+    session = ExportSession(context)
+    basepath = os.path.splitext(filepath)[0]
+
+    if 'EIF' in Formats:
+        eif_export.save(context,
+                        basepath + '.eif',
+                        Output_GeomNode=True,
+                        Output_PlaceNode=True,
+                        Transform_Center=False,
+                        Output_Mesh_UV=Output_Mesh_UV,
+                        Output_Mesh_Vertex_Colors=Output_Mesh_Vertex_Colors,
+                        Output_Face_Shaders=True,
+                        Decimal_Precision=Decimal_Precision,
+                        Output_Scale=Output_Scale,
+                        Use_Fragment_Cache=Use_Fragment_Cache,
+                        session=session)
+
+    if 'ESE' in Formats:
+        ese_export.save(context,
+                        basepath + '.ese',
+                        Output_Mesh_Definition=True,
+                        Output_Materials=Output_Materials,
+                        Output_Mesh_Anims=Output_Mesh_Anims,
+                        Output_CameraLightAnims=Output_CameraLightAnims,
+                        Transform_Center=False,
+                        Object_Types=Object_Types & ESE_OBJECT_TYPES,
+                        Output_Mesh_Normals=Output_Mesh_Normals,
+                        Output_Mesh_UV=Output_Mesh_UV,
+                        Output_Mesh_Vertex_Colors=Output_Mesh_Vertex_Colors,
+                        Output_Mesh_Morph=False,
+                        Static_Frame=Static_Frame,
+                        Decimal_Precision=Decimal_Precision,
+                        Output_Scale=Output_Scale,
+                        Enable_Start_From_Frame=False,
+                        Start_From_Frame=1,
+                        Enable_End_With_Frame=False,
+                        End_With_Frame=250,
+                        Output_First_Only=False,
+                        Use_Fragment_Cache=Use_Fragment_Cache,
+                        session=session)
+
+    if 'RTG' in Formats:
+        rtg_export.save(context,
+                        basepath + '.rtg',
+                        Output_Mesh_Definition=True,
+                        Output_Materials=Output_Materials,
+                        Output_Mesh_Anims=Output_Mesh_Anims,
+                        Output_CameraLightAnims=Output_CameraLightAnims,
+                        Transform_Center=True,
+                        Object_Types=Object_Types & RTG_OBJECT_TYPES,
+                        Output_Mesh_Normals=Output_Mesh_Normals,
+                        Output_Mesh_UV=Output_Mesh_UV,
+                        Output_Mesh_Vertex_Colors=Output_Mesh_Vertex_Colors,
+                        Output_Mesh_Morph=False,
+                        Static_Frame=Static_Frame,
+                        Decimal_Precision=Decimal_Precision,
+                        Output_Scale=Output_Scale,
+                        Enable_Start_From_Frame=False,
+                        Start_From_Frame=1,
+                        Enable_End_With_Frame=False,
+                        End_With_Frame=250,
+                        Output_First_Only=False,
+                        Use_Fragment_Cache=Use_Fragment_Cache,
+                        session=session)
+
+    return {'FINISHED'}
+
+
+if __name__ == '__main__':
+    save(bpy.context,
+         str(Path.home()) + '/Desktop/Eurocom',
+         Formats={'EIF', 'ESE', 'RTG'},
+         Object_Types={'MESH', 'CAMERA'},
+         Output_Materials=True,
+         Output_Mesh_Anims=False,
+         Output_CameraLightAnims=False,
+         Output_Mesh_Normals=True,
+         Output_Mesh_UV=True,
+         Output_Mesh_Vertex_Colors=False,
+         Static_Frame=1,
+         Decimal_Precision=6,
+         Output_Scale=1.0)
@@ -0,0 +1,70 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Bulk array-to-text formatting shared by the EIF, ESE and RTG writers. This module does not
+depend on bpy, so the text side of an export can also be timed from a plain Python session.
+"""
+
+import numpy as np
+from itertools import chain
+
+#-------------------------------------------------------------------------------------------------------------------------------
+FORMAT_CHUNK_ROWS = 4096
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def table_rows(rows):
+    rows = np.asarray(rows)
+    return rows.reshape(len(rows), -1) if rows.ndim == 1 else rows
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: prepend a running index column; the mixed table ends up as float64, which is lossless for
+#      our float32 mesh data, and '%d' prints whole floats the same way it prints integers
+#-------------------------------------------------------------------------------------------------------------------------------
+def indexed_rows(rows, start=0):
+    rows = table_rows(rows)
+    return np.column_stack((np.arange(start, start + len(rows)), rows))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: instead of formatting and writing every line on its own, repeat the row template and format a whole
+#      block of rows with a single %-operation; the text is exactly the same as the one-line-at-a-time version
+#-------------------------------------------------------------------------------------------------------------------------------
+def format_rows(template, rows, chunk_rows=FORMAT_CHUNK_ROWS):
+    values = table_rows(rows).tolist() if not isinstance(rows, list) else rows
+
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        yield (template * len(chunk)) % tuple(chain.from_iterable(chunk))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_rows(out, template, rows, chunk_rows=FORMAT_CHUNK_ROWS):
+    for text in format_rows(template, rows, chunk_rows):
+        out.write(text)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_lines(out, lines, chunk_rows=FORMAT_CHUNK_ROWS):
+    for start in range(0, len(lines), chunk_rows):
+        out.write(''.join(lines[start:start + chunk_rows]))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: same thing for rows with a variable amount of trailing items, laid out like a CSR matrix; row i owns
+#      items[offsets[i]:offsets[i + 1]], and its template is the head, one item template per item and the tail
+#-------------------------------------------------------------------------------------------------------------------------------
+def format_ragged_rows(head, item, tail, headers, offsets, items, chunk_rows=FORMAT_CHUNK_ROWS):
+    headers = table_rows(headers).tolist()
+    items = table_rows(items).tolist()
+    offsets = np.asarray(offsets).tolist()
+
+    for start in range(0, len(headers), chunk_rows):
+        rows = range(start, min(start + chunk_rows, len(headers)))
+        template = ''.join(head + item * (offsets[row + 1] - offsets[row]) + tail for row in rows)
+        values = []
+        for row in rows:
+            values.extend(headers[row])
+            values.extend(chain.from_iterable(items[offsets[row]:offsets[row + 1]]))
+        yield template % tuple(values)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_ragged_rows(out, head, item, tail, headers, offsets, items, chunk_rows=FORMAT_CHUNK_ROWS):
+    for text in format_ragged_rows(head, item, tail, headers, offsets, items, chunk_rows):
+        out.write(text)
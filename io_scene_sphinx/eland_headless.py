@@ -0,0 +1,36 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Headless entry point for background exports; eland_background.py starts it as
+  blender -b <copy of the scene>.blend --python eland_headless.py -- <add-on module> <job file>
+and the job file tells which exporter to run and with what options.
+"""
+
+import sys
+import json
+import importlib
+import addon_utils
+import bpy
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def main(argv):
+    package, job_path = argv[argv.index('--') + 1:][:2]
+
+    with open(job_path, 'r', encoding="utf8") as job_file:
+        job = json.load(job_file)
+
+    # swy: JSON has no sets; the ENUM_FLAG options travel as lists and get turned back here
+    keywords = job["keywords"]
+    for key in job["sets"]:
+        keywords[key] = set(keywords[key])
+
+    if addon_utils.enable(package, default_set=False) is None:
+        raise RuntimeError("can't enable the %s add-on in the background instance" % package)
+
+    exporter = importlib.import_module('%s.%s' % (package, job["exporter"]))
+    exporter.save(bpy.context, **keywords)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    main(sys.argv)
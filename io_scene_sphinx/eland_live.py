@@ -0,0 +1,190 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Live export; while it is toggled on in the scene properties, every object whose geometry, transform or
+materials change gets noted down, and once the edits settle for a moment the target ESE or EIF file is
+written again, with the options last used in the export dialog of that format. The extracted meshes are
+kept between runs and only the noted down objects get evaluated again; with the fragment cache on, the
+blocks of the rest come straight out of it.
+"""
+
+import os
+import time
+import importlib
+import bpy
+from .eland_utils import ExportSession
+
+#-------------------------------------------------------------------------------------------------------------------------------
+DEBOUNCE_SECONDS = 0.5
+
+# swy: the operator whose last used options each format is written with, and the module that writes it
+LIVE_EXPORTERS = {
+    'ESE': ("export_scene.ese", 'ese_export', '.ese'),
+    'EIF': ("export_scene.eif", 'eif_export', '.eif'),
+}
+
+# swy: dialog-only options, or ones that make no sense while writing from a timer
+IGNORED_OPTIONS = {
+    'rna_type', 'filepath', 'axis_forward', 'axis_up', 'global_scale', 'check_existing', 'filter_glob',
+    'path_mode', 'Modal_Export', 'Background_Export',
+}
+
+dirty_objects = set()
+geometry_caches = {}
+last_update = 0.0
+exporting = False
+status = ""
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def material_users(scene, material):
+    return {ob.name for ob in scene.objects if any(slot.material == material for slot in ob.material_slots)}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the depsgraph hands over evaluated copies; look at the original datablocks to know what the artist touched
+#-------------------------------------------------------------------------------------------------------------------------------
+def collect_updates(scene, depsgraph):
+    changed = set()
+    for update in depsgraph.updates:
+        datablock = update.id.original
+        if isinstance(datablock, bpy.types.Object):
+            if update.is_updated_geometry or update.is_updated_transform:
+                changed.add(datablock.name)
+        elif isinstance(datablock, bpy.types.Material):
+            changed |= material_users(scene, datablock)
+    return changed
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def request_export(names=()):
+    global last_update
+
+    dirty_objects.update(names)
+    last_update = time.monotonic()
+    if not bpy.app.timers.is_registered(flush_live_export):
+        bpy.app.timers.register(flush_live_export, first_interval=DEBOUNCE_SECONDS)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: persistent, so that it keeps working after opening another .blend; the toggle itself is saved per scene
+#-------------------------------------------------------------------------------------------------------------------------------
+@bpy.app.handlers.persistent
+def live_export_update_handler(scene, depsgraph):
+    # swy: the export moves through frames and modes on its own; those updates are not edits
+    if exporting:
+        return
+
+    props = scene.euro_properties
+    if not props.live_export or not props.live_export_path:
+        return
+
+    changed = collect_updates(scene, depsgraph)
+    if changed:
+        request_export(changed)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the same keywords the export operator would hand to its exporter; ENUM_FLAG options come back as sets
+#-------------------------------------------------------------------------------------------------------------------------------
+def last_used_options(context, operator):
+    properties = context.window_manager.operator_properties_last(operator)
+    return {
+        prop.identifier: getattr(properties, prop.identifier)
+        for prop in properties.bl_rna.properties if prop.identifier not in IGNORED_OPTIONS
+    }
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the meshes extracted by earlier runs stay around in geometry_caches; the ones of the objects that
+#      changed get dropped, so those are the only ones that get evaluated again
+#-------------------------------------------------------------------------------------------------------------------------------
+def forget_geometry(names):
+    for name in names:
+        ob = bpy.data.objects.get(name)
+        if ob is None or ob.type != 'MESH':
+            continue
+        for cache in geometry_caches.values():
+            cache.forget(ob)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_live_export(context, filepath, file_format, changed):
+    operator, module, extension = LIVE_EXPORTERS[file_format]
+    exporter = importlib.import_module('%s.%s' % (__package__, module))
+
+    keywords = last_used_options(context, operator)
+    keywords['Use_Fragment_Cache'] = True
+
+    forget_geometry(changed)
+    exporter.save(context,
+                  os.path.splitext(filepath)[0] + extension,
+                  session=ExportSession(context, geometry_caches),
+                  **keywords)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: timer callback; returning a number runs it again after that many seconds, returning None stops it
+#-------------------------------------------------------------------------------------------------------------------------------
+def flush_live_export():
+    global exporting, status
+
+    remaining = last_update + DEBOUNCE_SECONDS - time.monotonic()
+    if remaining > 0.0:
+        return remaining
+
+    context = bpy.context
+    props = context.scene.euro_properties
+    if not props.live_export or not props.live_export_path:
+        forget_everything()
+        return None
+
+    # swy: exporting switches to object mode and back, which would get in the way of editing; the mode change
+    #      when the artist leaves edit mode is an update too, so the pending objects get written out then
+    if context.mode != 'OBJECT':
+        return None
+
+    changed = set(dirty_objects)
+    dirty_objects.clear()
+
+    exporting = True
+    try:
+        write_live_export(context, bpy.path.abspath(props.live_export_path), props.live_export_format, changed)
+        status = "Exported %u changed object(s) at %s" % (len(changed), time.strftime("%H:%M:%S"))
+    except Exception as error:
+        # swy: whatever was kept may be half updated now; start over from the scene next time
+        geometry_caches.clear()
+        status = "Live export failed: %s" % error
+        print("Live export failed:", error)
+    finally:
+        exporting = False
+
+    return None
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def update_live_export(self, context):
+    if self.live_export:
+        request_export()
+    else:
+        forget_everything()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: undo and loading a file swap the datablocks underneath; the kept meshes are keyed by their pointers
+#-------------------------------------------------------------------------------------------------------------------------------
+@bpy.app.handlers.persistent
+def forget_everything(*args):
+    dirty_objects.clear()
+    geometry_caches.clear()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+RESET_HANDLERS = (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(live_export_update_handler)
+    for handlers in RESET_HANDLERS:
+        handlers.append(forget_everything)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def unregister():
+    if live_export_update_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(live_export_update_handler)
+    for handlers in RESET_HANDLERS:
+        if forget_everything in handlers:
+            handlers.remove(forget_everything)
+    if bpy.app.timers.is_registered(flush_live_export):
+        bpy.app.timers.unregister(flush_live_export)
+    forget_everything()
@@ -0,0 +1,78 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Modal exports; runs the progress steps of an exporter in short time slices from a window timer, so Blender
+keeps redrawing, shows how far along it is and can be cancelled with Esc.
+"""
+
+import os
+import time
+import bpy
+
+#-------------------------------------------------------------------------------------------------------------------------------
+TIMER_INTERVAL = 0.01
+SLICE_SECONDS = 0.1
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: mixed into the export operators; execute() hands over the generator of its exporter to start_modal()
+#      instead of running it in one go
+#-------------------------------------------------------------------------------------------------------------------------------
+class ModalExport:
+    def start_modal(self, context, steps, filepath):
+        self.steps = steps
+        self.modal_filepath = filepath
+        self.progress = 0.0
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        self.show_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def show_progress(self, context):
+        context.window_manager.progress_update(int(self.progress * 100))
+        context.workspace.status_text_set(
+            "Exporting %s: %d%% (Esc to cancel)" % (os.path.basename(self.modal_filepath), self.progress * 100)
+        )
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self.finish_modal(context, cancelled=True)
+
+        # swy: keep the artist's clicks and keys away from the scene while it is being read halfway through
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {'RUNNING_MODAL'}
+
+        deadline = time.monotonic() + SLICE_SECONDS
+        try:
+            while time.monotonic() < deadline:
+                self.progress = next(self.steps)
+        except StopIteration:
+            return self.finish_modal(context)
+        except Exception as error:
+            self.report({'ERROR'}, "Export failed: %s" % error)
+            return self.finish_modal(context, cancelled=True)
+
+        self.show_progress(context)
+        return {'RUNNING_MODAL'}
+
+    # swy: closing the generator runs the cleanup of the exporter, which puts the frame and mode back;
+    #      a cancelled export leaves half a file behind, so that one goes away
+    def finish_modal(self, context, cancelled=False):
+        self.steps.close()
+
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+        if cancelled:
+            if os.path.exists(self.modal_filepath):
+                os.remove(self.modal_filepath)
+            self.report({'WARNING'}, "Export cancelled")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, "Exported %s" % self.modal_filepath)
+        return {'FINISHED'}
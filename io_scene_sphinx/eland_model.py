@@ -0,0 +1,316 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Export model shared by the EIF, ESE and RTG writers. The bpy side of each exporter fills these records with
+plain values and NumPy arrays; the writers only read them, so they can run (and be profiled) without Blender.
+"""
+
+import numpy as np
+
+#-------------------------------------------------------------------------------------------------------------------------------
+SHADER_RULES = {'Non', 'HPH', 'OPO', 'OMO', 'OPQ', 'Alp'}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def precision_tolerance(precision):
+    return 0.5 * 10.0 ** -precision
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a track is constant when every sample stays within the written precision of the first one
+#-------------------------------------------------------------------------------------------------------------------------------
+def constant_track(values, tolerance):
+    values = np.asarray(values)
+    return len(values) < 2 or bool(np.all(np.abs(values - values[0]) <= tolerance))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def scaled_color(color, scale):
+    return tuple(max(0.0, min(component * scale, 1.0)) for component in color[:3])
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: ordered dedup for a (N, W) array; returns the unique rows in order of first appearance, the remap array
+#      that takes every original row to its unique index, and the source row of every unique entry.
+#      np.unique() compares by value, so -0.0 and 0.0 get welded together like dict keys do
+#-------------------------------------------------------------------------------------------------------------------------------
+def unique_rows(rows):
+    if not len(rows):
+        return rows[:0], np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    _, first_index, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+
+    order = np.argsort(first_index)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    source = first_index[order]
+    return rows[source], rank[inverse.reshape(-1)], source
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: AB/BC/CA visibility of every triangle; an edge is a real polygon edge when its two corners are next to
+#      each other along the polygon boundary, otherwise it is a diagonal added by the triangulation
+#-------------------------------------------------------------------------------------------------------------------------------
+def triangle_edge_visibility(loop_start, loop_total, tri_loops, tri_polygons):
+    corners = tri_loops - loop_start[tri_polygons, None]
+    total = loop_total[tri_polygons, None]
+
+    steps = (np.roll(corners, -1, axis=1) - corners) % total
+    return (steps == 1) | (steps == total - 1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def polygon_material_indices(material_indices, materials):
+    if not materials:
+        return np.full(len(material_indices), -1, dtype=np.int32)
+
+    return np.where(material_indices < len(materials), material_indices, 0)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: dedup a bunch of per-corner UV or color layers against each other in one go; returns the shared list of
+#      unique values and a (layers, loops) array with the index of each face corner in that list
+#-------------------------------------------------------------------------------------------------------------------------------
+def unique_layer_rows(layers, width, loop_count):
+    if not layers:
+        return np.empty((0, width), dtype=np.float32), np.empty((0, loop_count), dtype=np.int64)
+
+    unique, remap, _ = unique_rows(np.concatenate(layers))
+    return unique, remap.reshape(len(layers), -1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: picks a subset of CSR rows (e.g. the source vertex of every welded vertex) and returns them packed again
+#-------------------------------------------------------------------------------------------------------------------------------
+def csr_take(offsets, rows):
+    starts = offsets[rows]
+    counts = offsets[np.asarray(rows) + 1] - starts
+
+    taken = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=taken[1:])
+    items = np.repeat(starts - taken[:-1], counts) + np.arange(taken[-1])
+    return taken, items
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def cross_rows(a, b):
+    return np.stack((
+        a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+        a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2],
+        a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0],
+    ), axis=1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: polygon normals out of the float32 corner positions of every face (CSR offsets), with the same float
+#      math Blender uses: a plain cross product for triangles and quads, Newell's method for anything bigger.
+#      Triangles get divided by their length and the rest multiplied by its reciprocal, like it does; degenerate
+#      triangles and quads end up as zero, degenerate ngons point up
+#-------------------------------------------------------------------------------------------------------------------------------
+def polygon_normals(corners, offsets):
+    corners = np.asarray(corners, dtype=np.float32)
+    first, totals = offsets[:-1], np.diff(offsets)
+    normals = np.zeros((len(totals), 3), dtype=np.float32)
+
+    tris = np.flatnonzero(totals == 3)
+    v0, v1, v2 = (corners[first[tris] + k] for k in range(3))
+    normals[tris] = cross_rows(v0 - v1, v1 - v2)
+
+    quads = np.flatnonzero(totals == 4)
+    v0, v1, v2, v3 = (corners[first[quads] + k] for k in range(4))
+    normals[quads] = cross_rows(v0 - v2, v1 - v3)
+
+    ngons = np.flatnonzero(totals > 4)
+    for k in range(int(totals[ngons].max(initial=0))):
+        ngons = ngons[totals[ngons] > k]
+        prev = corners[first[ngons] + (k - 1) % totals[ngons]]
+        curr = corners[first[ngons] + k]
+        normals[ngons] += np.stack((
+            (prev[:, 1] - curr[:, 1]) * (prev[:, 2] + curr[:, 2]),
+            (prev[:, 2] - curr[:, 2]) * (prev[:, 0] + curr[:, 0]),
+            (prev[:, 0] - curr[:, 0]) * (prev[:, 1] + curr[:, 1]),
+        ), axis=1)
+
+    x, y, z = normals.T
+    squared = (x * x + y * y) + z * z
+    usable = squared > np.float32(1.0e-35)
+    lengths = np.sqrt(np.where(usable, squared, np.float32(1.0)))
+
+    divided = (totals == 3)[:, None]
+    normals = np.where(divided, normals / lengths[:, None], normals * (np.float32(1.0) / lengths)[:, None])
+    normals[~usable] = 0.0
+    normals[~usable & (totals > 4), 2] = 1.0
+    return normals
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: everything the writers need from an evaluated mesh, as flat arrays in object space; the bpy side fills
+#      it in with mesh_geometry(), after that the temporary mesh can go away, and every instance just places
+#      the cached arrays with its own matrix
+#-------------------------------------------------------------------------------------------------------------------------------
+class MeshGeometry:
+    __slots__ = (
+        'unique_vertices', 'vertex_remap', 'vertex_source', 'loop_vertices', 'loop_start', 'loop_total',
+        'material_indices', 'smooth', 'tri_loops', 'tri_polygons', 'flipped_tri_loops', 'flipped_tri_polygons',
+        'uv_rows', 'uv_active', 'color_rows', 'color_corner', 'color_active', 'face_flags', 'vertex_flags',
+        'material_names', 'influences', 'unique_layers',
+    )
+
+    # swy: caches built from the other slots; they don't tell two meshes apart
+    derived_slots = ('unique_layers',)
+
+    def __init__(self, **arrays):
+        for name in self.__slots__:
+            setattr(self, name, arrays.get(name))
+        self.unique_layers = {}
+
+    def corner_color_layers(self):
+        return [layer_index for layer_index, corner in enumerate(self.color_corner) if corner]
+
+    # swy: point-domain color attributes hold one value per vertex; spread them over the face corners. Go by
+    #      the domain the layer came from, vertex and corner counts can be the same (e.g. loose triangles)
+    def corner_rows(self, layer_index):
+        rows = self.color_rows[layer_index]
+        return rows if self.color_corner[layer_index] else rows[self.loop_vertices]
+
+    # swy: the values get deduped in the corner order they are written in, so flipped meshes dedup the corners
+    #      as flip_normals() leaves them; the indices still go by the original loops
+    def unique_corner_rows(self, key, rows, width, flip):
+        key += (flip,)
+        if key not in self.unique_layers:
+            if flip:
+                order = self.face_corners(flip=True)[1]
+                unique, flipped = unique_layer_rows([layer[order] for layer in rows], width, len(order))
+                indices = np.empty_like(flipped)
+                indices[:, order] = flipped
+                self.unique_layers[key] = unique, indices
+            else:
+                self.unique_layers[key] = unique_layer_rows(rows, width, len(self.loop_vertices))
+        return self.unique_layers[key]
+
+    def unique_uvs(self, layers, flip=False):
+        rows = [self.uv_rows[layer_index] for layer_index in layers]
+        return self.unique_corner_rows(('UV', tuple(layers)), rows, 2, flip)
+
+    def unique_colors(self, layers, flip=False):
+        rows = [self.corner_rows(layer_index) for layer_index in layers]
+        return self.unique_corner_rows(('COLOR', tuple(layers)), rows, 4, flip)
+
+    # swy: Blender may split the flipped polygons along other diagonals, so the extraction reads those
+    #      triangles too, as loop indices of the unflipped mesh
+    def triangles(self, flip=False):
+        if flip:
+            return self.flipped_tri_loops, self.flipped_tri_polygons
+        return self.tri_loops, self.tri_polygons
+
+    # swy: the corners of every exported face in CSR form (offsets, loops), plus the polygon behind each face;
+    #      those faces are either the polygons themselves or their triangles. flip_normals() keeps the first
+    #      corner of every polygon and reverses the rest; we do the same with the loop indices instead
+    def face_corners(self, triangulate=False, flip=False):
+        if triangulate:
+            tri_loops, tri_polygons = self.triangles(flip)
+            return np.arange(0, tri_loops.size + 1, 3), tri_loops.reshape(-1), tri_polygons
+
+        offsets = np.zeros(len(self.loop_total) + 1, dtype=np.int64)
+        np.cumsum(self.loop_total, out=offsets[1:])
+        corners = np.arange(offsets[-1]) - np.repeat(offsets[:-1], self.loop_total)
+        if flip:
+            totals = np.repeat(self.loop_total, self.loop_total)
+            corners = (totals - corners) % totals
+
+        loops = np.repeat(self.loop_start, self.loop_total) + corners
+        return offsets, loops, np.arange(len(self.loop_total))
+
+    # swy: float32 all the way, summing in the same order as Mesh.transform() did, so the positions come
+    #      out bit for bit like they used to when the exporters transformed a mesh copy
+    def placed_vertices(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        x, y, z = self.unique_vertices.astype(np.float32, copy=False).T[:, :, None]
+        return x * matrix[:3, 0] + y * matrix[:3, 1] + z * matrix[:3, 2] + matrix[:3, 3]
+
+    # swy: the normals Blender would recompute for the placed (and flipped) polygons
+    def placed_normals(self, matrix, flip=False):
+        vertices = self.placed_vertices(matrix)[self.vertex_remap[self.loop_vertices]]
+        offsets, loops, _ = self.face_corners(flip=flip)
+        return polygon_normals(vertices[loops], offsets)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the material properties the writers look at; None stands for an empty slot, written as "Default"
+#-------------------------------------------------------------------------------------------------------------------------------
+class MaterialRecord:
+    __slots__ = (
+        'name', 'color', 'alpha', 'texture', 'image_name', 'blend_method', 'metallic', 'specular', 'roughness',
+        'self_illumination', 'twosided', 'shader', 'euro_shader',
+    )
+
+    def __init__(self, name="Default", color=(0.8, 0.8, 0.8), alpha=1.0, texture=None, image_name=None,
+                 blend_method='OPAQUE', metallic=0.0, specular=0.0, roughness=0.5, self_illumination=0.0,
+                 twosided=False, shader=None, euro_shader=None):
+        self.name = name
+        self.color = tuple(color)
+        self.alpha = alpha
+        self.texture = texture
+        self.image_name = image_name
+        self.blend_method = blend_method
+        self.metallic = metallic
+        self.specular = specular
+        self.roughness = roughness
+        self.self_illumination = self_illumination
+        self.twosided = twosided
+        self.shader = shader
+        self.euro_shader = euro_shader
+
+    # swy: the first custom shader property holding a known rule wins; anything else is plain 'Non'
+    def shader_rule(self, *properties):
+        for prop in properties:
+            rule = getattr(self, prop)
+            if rule in SHADER_RULES:
+                return rule
+        return 'Non'
+
+    def has_alpha(self):
+        if self.alpha < 0.999 or self.blend_method in {'BLEND', 'HASHED', 'CLIP'}:
+            return True
+        return bool(self.texture and self.texture.lower().endswith((".tga", ".png")))
+
+DEFAULT_MATERIAL = MaterialRecord()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: one exported object; matrix is its (instance) world matrix, tracks hold sampled (frames, values) pairs
+#      and transforms any per-format matrix rows the extraction already converted to EuroLand space
+#-------------------------------------------------------------------------------------------------------------------------------
+class NodeRecord:
+    __slots__ = ('name', 'type', 'parent', 'matrix', 'geometry', 'materials', 'settings', 'tracks', 'transforms')
+
+    def __init__(self, name, node_type, matrix, parent=None, geometry=None, materials=(), settings=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.geometry = geometry
+        self.materials = tuple(materials)
+        self.settings = settings
+        self.tracks = {}
+        self.transforms = {}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: properties are the custom (name, type, value) scene properties, and material_lists the material keys
+#      of every mesh object by name, for the formats that list materials per object instead of per scene
+#-------------------------------------------------------------------------------------------------------------------------------
+class SceneModel:
+    __slots__ = (
+        'filepath', 'frame_start', 'frame_end', 'frame_current', 'fps', 'ambient', 'materials', 'nodes',
+        'blender_version', 'plugin_version', 'properties', 'material_lists',
+    )
+
+    def __init__(self, filepath="", frame_start=0, frame_end=0, frame_current=0, fps=30, ambient=(0.8, 0.8, 0.8),
+                 blender_version="", plugin_version=(0, 0, 0)):
+        self.filepath = filepath
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.frame_current = frame_current
+        self.fps = fps
+        self.ambient = tuple(ambient)
+        self.blender_version = blender_version
+        self.plugin_version = tuple(plugin_version)
+        self.materials = {}
+        self.nodes = []
+        self.properties = []
+        self.material_lists = {}
+
+    def material(self, name):
+        return self.materials.get(name) or DEFAULT_MATERIAL
+
+    def nodes_of_type(self, node_type):
+        return [node for node in self.nodes if node.type == node_type]
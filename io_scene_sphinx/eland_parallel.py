@@ -0,0 +1,203 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Ways of overlapping an export with other work: an optional process pool for the pure writer functions, whose
+sections get written back in the same order they were queued in, so the output does not change, and a writer
+thread that takes the disk writes off the thread that reads the scene.
+"""
+
+import io
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def worker_count(processes):
+    return processes if processes > 0 else (os.cpu_count() or 1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: workers are spawned as plain Python interpreters, and importing our package normally runs its __init__,
+#      which needs bpy; register bare package modules pointing to the add-on folder instead, so only the
+#      bpy-free modules (writers, model, formatting) get imported on the other side
+#-------------------------------------------------------------------------------------------------------------------------------
+def bootstrap_source():
+    parts = __package__.split('.')
+    packages = [('.'.join(parts[:depth]), []) for depth in range(1, len(parts))]
+    packages.append((__package__, [os.path.dirname(os.path.abspath(__file__))]))
+
+    return (
+        "import sys, types\n"
+        "for name, path in %r:\n"
+        "    if name not in sys.modules:\n"
+        "        module = types.ModuleType(name)\n"
+        "        module.__path__ = path\n"
+        "        sys.modules[name] = module\n"
+    ) % (packages,)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def format_section(writer, *args, **kwargs):
+    out = io.StringIO()
+    writer(out, *args, **kwargs)
+    return out.getvalue()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: stands in for the output file; plain writes and sections handed to a worker are queued in order, and
+#      whatever is ready at the front of the queue gets written out. With a single process there is no pool
+#      and everything goes straight to the file, like before
+#-------------------------------------------------------------------------------------------------------------------------------
+class SectionWriter:
+    def __init__(self, out, processes=1, cache=None):
+        self.out = out
+        self.pending = []
+        self.executor = None
+        self.cache = cache
+
+        if worker_count(processes) > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=worker_count(processes),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=exec,
+                initargs=(bootstrap_source(), {})
+            )
+
+    def write(self, text):
+        if self.executor:
+            self.pending.append(text)
+        else:
+            self.out.write(text)
+
+    # swy: sections already in the fragment cache are spliced in as they are, the rest get formatted
+    #      (here or in a worker) and stored once their text is ready
+    def section(self, writer, *args, **kwargs):
+        key = None
+        if self.cache:
+            key = self.cache.key(writer, args, kwargs)
+            text = self.cache.load(key)
+            if text is not None:
+                self.write(text)
+                return
+
+        if self.executor:
+            self.pending.append((self.executor.submit(format_section, writer, *args, **kwargs), key))
+        elif key:
+            text = format_section(writer, *args, **kwargs)
+            self.cache.store(key, text)
+            self.out.write(text)
+        else:
+            writer(self.out, *args, **kwargs)
+
+    def drain(self, wait=False):
+        written = 0
+        for item in self.pending:
+            if isinstance(item, str):
+                self.out.write(item)
+            elif wait or item[0].done():
+                text = item[0].result()
+                if item[1]:
+                    self.cache.store(item[1], text)
+                self.out.write(text)
+            else:
+                break
+            written += 1
+        del self.pending[:written]
+
+    def close(self):
+        try:
+            self.drain(wait=True)
+        finally:
+            if self.executor:
+                self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        elif self.executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: drop-in for the text file of an export; writes are gathered into big chunks that go through a bounded
+#      queue to a thread that does the actual (maybe slow, think network shares) disk writes, while the main
+#      thread keeps reading the scene. The queue size caps how much text can pile up in memory
+#-------------------------------------------------------------------------------------------------------------------------------
+class ChunkWriter:
+    CHUNK_SIZE = 1 << 20
+    QUEUE_CHUNKS = 8
+
+    def __init__(self, filepath, encoding="utf8", chunk_size=CHUNK_SIZE, queue_chunks=QUEUE_CHUNKS):
+        self.file = open(filepath, 'w', encoding=encoding, buffering=chunk_size)
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(maxsize=queue_chunks)
+        self.parts = []
+        self.size = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name="eland-writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                break
+            if self.error is None:
+                try:
+                    self.file.write(chunk)
+                except Exception as error:
+                    self.error = error
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.chunk_size:
+            self.flush_chunk()
+
+    def flush_chunk(self):
+        if self.error is not None:
+            raise self.error
+        if self.parts:
+            self.queue.put(''.join(self.parts))
+            self.parts = []
+            self.size = 0
+
+    def close(self):
+        if self.thread is None:
+            return
+        try:
+            self.flush_chunk()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.parts = []
+            try:
+                self.close()
+            except Exception:
+                pass
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: lets the pure writers hand a section over when they are writing through a SectionWriter, and just
+#      write it in place when they were given a plain file
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_section(out, writer, *args, **kwargs):
+    if isinstance(out, SectionWriter):
+        out.section(writer, *args, **kwargs)
+    else:
+        writer(out, *args, **kwargs)
@@ -1,7 +1,11 @@
 import bpy
+import numpy as np
 from mathutils import Matrix, Euler
 from bpy_extras.node_shader_utils import PrincipledBSDFWrapper
 from . import bl_info
+from .eland_format import *
+from .eland_model import *
+from .eland_cache import FragmentCache
 
 #-------------------------------------------------------------------------------------------------------------------------------
 MESH_GLOBAL_MATRIX = Matrix(((1, 0, 0),(0, 0, 1),(0, 1, 0))).to_4x4()
@@ -13,56 +17,761 @@ def get_plugin_version():
     return version
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def tri_edge_is_from_ngon(polygon, tri_loop_indices, tri_idx, mesh_loops):
-    loop_start = polygon.loop_start
-    loop_end = loop_start + polygon.loop_total
+def get_tabs(level):
+    return '\t' * level
 
-    current_loop_idx = tri_loop_indices[tri_idx]
-    next_loop_idx = tri_loop_indices[(tri_idx + 1) % len(tri_loop_indices)]
+#-------------------------------------------------------------------------------------------------------------------------------
+def foreach_array(collection, attribute, width=1, dtype=np.float32):
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    return values.reshape(-1, width) if width > 1 else values
 
-    return next_loop_idx not in range(loop_start, loop_end) or current_loop_idx not in range(loop_start, loop_end)
+#-------------------------------------------------------------------------------------------------------------------------------
+def mesh_loop_vertices(mesh):
+    return foreach_array(mesh.loops, 'vertex_index', dtype=np.int32)
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def mesh_triangulate(me):
-    import bmesh
-    bm = bmesh.new()
-    bm.from_mesh(me)
-    bmesh.ops.triangulate(bm, faces=bm.faces)
-    bm.to_mesh(me)
-    bm.free()
+def mesh_polygon_loops(mesh):
+    loop_start = foreach_array(mesh.polygons, 'loop_start', dtype=np.int32)
+    loop_total = foreach_array(mesh.polygons, 'loop_total', dtype=np.int32)
+    return loop_start, loop_total
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def get_tabs(level):
-    return '\t' * level
+# swy: Blender already keeps a triangulation of every polygon around; reading it is way cheaper than running
+#      bmesh over a copy of the mesh. polygon_index takes every triangle back to the face it comes from
+#-------------------------------------------------------------------------------------------------------------------------------
+def mesh_loop_triangles(mesh):
+    mesh.calc_loop_triangles()
+    tri_loops = foreach_array(mesh.loop_triangles, 'loops', 3, dtype=np.int32)
+    tri_polygons = foreach_array(mesh.loop_triangles, 'polygon_index', dtype=np.int32)
+    return tri_loops, tri_polygons
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def unique_ordered(values):
-    result = []
-    index_map = {}
+# swy: the triangles Blender makes out of the flipped polygons, which do not always split along the same
+#      diagonals; given back as loops of the unflipped mesh. flip_normals() changes the mesh in place, so
+#      only use it on a temporary mesh that has nothing left to read
+#-------------------------------------------------------------------------------------------------------------------------------
+def mesh_flipped_loop_triangles(mesh, loop_start, loop_total):
+    mesh.flip_normals()
+    tri_loops, tri_polygons = mesh_loop_triangles(mesh)
 
-    for value in values:
-        if value not in index_map:
-            index_map[value] = len(result)
-            result.append(value)
+    start, total = loop_start[tri_polygons, None], loop_total[tri_polygons, None]
+    return start + (total - (tri_loops - start)) % total, tri_polygons
 
-    return result, index_map
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: vertex group weights are not exposed as a flat attribute, so this single walk is the only per-influence
+#      Python work left; what comes out is a CSR layout with the group and weight of every vertex influence
+#-------------------------------------------------------------------------------------------------------------------------------
+def vertex_group_influences(mesh):
+    counts = np.fromiter((len(vertex.groups) for vertex in mesh.vertices), dtype=np.int64, count=len(mesh.vertices))
+    elements = [element for vertex in mesh.vertices for element in vertex.groups]
+    groups = np.fromiter((element.group for element in elements), dtype=np.int64, count=len(elements))
+    weights = np.fromiter((element.weight for element in elements), dtype=np.float64, count=len(elements))
+    return counts, groups, weights
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def scaled_color(color, scale):
-    return tuple(max(0.0, min(component * scale, 1.0)) for component in color[:3])
+# swy: returns the bone influences of every vertex as (offsets, bones, weights), heaviest first and normalized;
+#      vertex groups that do not match a bone, and zero weights, are dropped on the way
+#-------------------------------------------------------------------------------------------------------------------------------
+def skin_weights(ob, influences, bone_names):
+    bone_lookup = {}
+    for bone_index, bone_name in enumerate(bone_names):
+        bone_lookup.setdefault(bone_name, bone_index)
+
+    # swy: one spare slot at the end, so that any group index we do not know about maps to -1
+    group_bones = np.full(max((group.index for group in ob.vertex_groups), default=-1) + 2, -1, dtype=np.int64)
+    for group in ob.vertex_groups:
+        group_bones[group.index] = bone_lookup.get(group.name, -1)
+
+    counts, groups, weights = influences
+    vertex_rows = np.repeat(np.arange(len(counts)), counts)
+    bones = group_bones[np.minimum(groups, len(group_bones) - 1)]
+
+    valid = (bones >= 0) & (weights > 0)
+    vertex_rows, bones, weights = vertex_rows[valid], bones[valid], weights[valid]
+
+    order = np.lexsort((-weights, vertex_rows))
+    vertex_rows, bones, weights = vertex_rows[order], bones[order], weights[order]
+
+    totals = np.bincount(vertex_rows, weights, minlength=len(counts))
+    weights = weights / totals[vertex_rows]
+
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(vertex_rows, minlength=len(counts)), out=offsets[1:])
+    return offsets, bones, weights
 
 #-------------------------------------------------------------------------------------------------------------------------------
-def color_layer_data(mesh):
+# swy: pulls everything the writers need out of an evaluated mesh, as flat arrays in object space
+#-------------------------------------------------------------------------------------------------------------------------------
+def mesh_geometry(mesh, skin=False):
+    unique_vertices, vertex_remap, vertex_source = unique_rows(foreach_array(mesh.vertices, 'co', 3))
+    loop_start, loop_total = mesh_polygon_loops(mesh)
+    tri_loops, tri_polygons = mesh_loop_triangles(mesh)
+
+    all_color_layers = list(mesh.color_attributes) if hasattr(mesh, "color_attributes") and mesh.color_attributes else list(mesh.vertex_colors)
+    corner_names = {layer.name for layer in color_layers(mesh)}
+    color_names = [layer.name for layer in all_color_layers]
+    active = active_color_layer(mesh)
+
+    face_flags = int_attribute(mesh, 'euro_fac_flags', 'FACE')
+    vertex_flags = int_attribute(mesh, 'euro_vtx_flags', 'POINT')
+
+    geometry = MeshGeometry(
+        unique_vertices=unique_vertices,
+        vertex_remap=vertex_remap,
+        vertex_source=vertex_source,
+        loop_vertices=mesh_loop_vertices(mesh),
+        loop_start=loop_start,
+        loop_total=loop_total,
+        material_indices=foreach_array(mesh.polygons, 'material_index', dtype=np.int32),
+        smooth=foreach_array(mesh.polygons, 'use_smooth', dtype=bool),
+        tri_loops=tri_loops,
+        tri_polygons=tri_polygons,
+        uv_rows=[foreach_array(layer.data, 'uv', 2) for layer in mesh.uv_layers],
+        uv_active=mesh.uv_layers.active_index if mesh.uv_layers.active else -1,
+        color_rows=[foreach_array(layer.data, 'color', 4) for layer in all_color_layers],
+        color_corner=[name in corner_names for name in color_names],
+        color_active=color_names.index(active.name) if active and active.name in color_names else -1,
+        face_flags=foreach_array(face_flags.data, 'value', dtype=np.int64) if face_flags else None,
+        vertex_flags=foreach_array(vertex_flags.data, 'value', dtype=np.int64) if vertex_flags else None,
+        material_names=[mat.name if mat else None for mat in mesh.materials],
+        influences=vertex_group_influences(mesh) if skin else None
+    )
+
+    geometry.flipped_tri_loops, geometry.flipped_tri_polygons = mesh_flipped_loop_triangles(mesh, loop_start, loop_total)
+    return geometry
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: instances of the same object, and linked duplicates without modifiers, end up with the very same
+#      evaluated mesh; we only call to_mesh() the first time and share the extracted arrays afterwards
+#-------------------------------------------------------------------------------------------------------------------------------
+class GeometryCache:
+    def __init__(self, depsgraph, apply_modifiers=True, skin=False):
+        self.depsgraph = depsgraph
+        self.apply_modifiers = apply_modifiers
+        self.skin = skin
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, ob):
+        ob = ob.original
+        if self.apply_modifiers and ob.modifiers:
+            return ('OBJECT', ob.as_pointer())
+        return ('MESH', ob.data.as_pointer())
+
+    # swy: drops what got extracted for an object the artist changed since, so the next get() reads it again
+    def forget(self, ob):
+        self.entries.pop(self.key(ob), None)
+
+    # swy: with store=False nothing new is kept around, so the caller can drop the geometry once written
+    def get(self, ob, store=True):
+        key = self.key(ob)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+
+        self.misses += 1
+        ob_eval = ob.evaluated_get(self.depsgraph) if self.apply_modifiers else ob.original
+
+        try:
+            mesh = ob_eval.to_mesh()
+        except RuntimeError:
+            mesh = None
+
+        geometry = None
+        if mesh is not None:
+            try:
+                geometry = mesh_geometry(mesh, self.skin)
+            finally:
+                ob_eval.to_mesh_clear()
+
+        if store:
+            self.entries[key] = geometry
+        return geometry
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: snapshot of scene.objects taken in a single pass; the writers used to go through the whole object list
+#      (and every material slot) once per object type, which adds up on its own on maps with lots of objects
+#-------------------------------------------------------------------------------------------------------------------------------
+class SceneIndex:
+    def __init__(self, scene):
+        self.scene = scene
+        self.objects = []
+        self.types = {}
+        self.children = {}
+        self.material_slots = {}
+        self.visible = {}
+        self.instanced_elements = set()
+
+        for ob in scene.objects:
+            pointer = ob.as_pointer()
+            parent = ob.parent
+
+            self.objects.append(ob)
+            self.types.setdefault(ob.type, []).append(ob)
+            self.children.setdefault(parent.as_pointer() if parent else None, []).append(ob)
+            self.visible[pointer] = ob.visible_get()
+
+            if ob.type == 'MESH':
+                self.material_slots[pointer] = tuple(slot.material for slot in ob.material_slots)
+
+            # swy: vertex and face instancing children are only exported through their instancer
+            if parent and parent.instance_type in {'VERTS', 'FACES'}:
+                self.instanced_elements.add(pointer)
+
+    def of_type(self, ob_type):
+        return self.types.get(ob_type, [])
+
+    def sorted_of_type(self, ob_type):
+        return sorted(self.of_type(ob_type), key=lambda ob: ob.name)
+
+    def meshes(self):
+        return [ob for ob in self.of_type('MESH') if ob.as_pointer() not in self.instanced_elements]
+
+    def is_instanced_element(self, ob):
+        return ob.as_pointer() in self.instanced_elements
+
+    def children_of(self, ob):
+        return self.children.get(ob.as_pointer() if ob else None, [])
+
+    def materials(self, ob):
+        return self.material_slots.get(ob.as_pointer(), ())
+
+    def is_visible(self, ob):
+        return self.visible.get(ob.as_pointer(), False)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: depsgraph.object_instances is walked only once per export; every generated instance gets grouped
+#      under the instancer that spawned it, so looking up the copies of an object is a dictionary hit
+#-------------------------------------------------------------------------------------------------------------------------------
+class InstanceIndex:
+    def __init__(self, depsgraph):
+        self.depsgraph = depsgraph
+        self.entries = {}
+
+        for dup in depsgraph.object_instances:
+            if not dup.parent:
+                continue
+            self.entries.setdefault(dup.parent.original.as_pointer(), []).append(
+                (dup.instance_object.original, dup.matrix_world.copy())
+            )
+
+    def instances(self, ob_main):
+        instances = [(ob_main, ob_main.matrix_world)]
+        if ob_main.is_instancer:
+            instances += self.entries.get(ob_main.original.as_pointer(), [])
+        return instances
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def iter_action_fcurves(action):
+    if action is None:
+        return
+
+    legacy_fcurves = getattr(action, "fcurves", None)
+    if legacy_fcurves is not None:
+        for fcurve in legacy_fcurves:
+            yield fcurve
+        return
+
+    slots = list(getattr(action, "slots", []))
+    seen_channelbags = set()
+
+    for layer in getattr(action, "layers", []):
+        for strip in getattr(layer, "strips", []):
+            for channelbag in getattr(strip, "channelbags", []):
+                pointer = channelbag.as_pointer()
+                if pointer in seen_channelbags:
+                    continue
+                seen_channelbags.add(pointer)
+                for fcurve in getattr(channelbag, "fcurves", []):
+                    yield fcurve
+
+            channelbag_for_slot = getattr(strip, "channelbag", None)
+            if callable(channelbag_for_slot):
+                for slot in slots:
+                    try:
+                        channelbag = channelbag_for_slot(slot)
+                    except TypeError:
+                        continue
+                    if channelbag is None:
+                        continue
+
+                    pointer = channelbag.as_pointer()
+                    if pointer in seen_channelbags:
+                        continue
+                    seen_channelbags.add(pointer)
+                    for fcurve in getattr(channelbag, "fcurves", []):
+                        yield fcurve
+
+#-------------------------------------------------------------------------------------------------------------------------------
+VISIBILITY_DATA_PATHS = {'hide_viewport', 'hide_render'}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: every action is scanned once per export, no matter how many objects, instances or data blocks share it;
+#      we keep the sorted keyframe times with and without the visibility curves, which only some callers want
+#-------------------------------------------------------------------------------------------------------------------------------
+class KeyframeIndex:
+    def __init__(self, scene):
+        self.scene = scene
+        self.actions = {}
+        self.markers = None
+
+    def scan(self, action):
+        frames, visibility_frames = [], []
+        for fcurve in iter_action_fcurves(action):
+            points = getattr(fcurve, "keyframe_points", None)
+            if not points:
+                continue
+            times = foreach_array(points, 'co', 2, dtype=np.float64)[:, 0]
+            (visibility_frames if fcurve.data_path in VISIBILITY_DATA_PATHS else frames).append(times)
+
+        frames = np.unique(np.concatenate(frames)) if frames else np.empty(0)
+        all_frames = np.union1d(frames, np.concatenate(visibility_frames)) if visibility_frames else frames
+        return frames, all_frames
+
+    def action_frames(self, action, include_visibility=True):
+        if action is None:
+            return np.empty(0)
+
+        key = action.as_pointer()
+        if key not in self.actions:
+            self.actions[key] = self.scan(action)
+
+        frames, all_frames = self.actions[key]
+        return all_frames if include_visibility else frames
+
+    def id_frames(self, data_block, include_visibility=True):
+        anim = getattr(data_block, "animation_data", None) if data_block else None
+        return self.action_frames(anim.action if anim else None, include_visibility)
+
+    def marker_frames(self):
+        if self.markers is None:
+            self.markers = np.array([marker.frame for marker in self.scene.timeline_markers], dtype=np.float64)
+        return self.markers
+
+#-------------------------------------------------------------------------------------------------------------------------------
+TRANSFORM_DATA_PATHS = {
+    'location': 3,
+    'rotation_euler': 3,
+    'rotation_quaternion': 4,
+    'rotation_axis_angle': 4,
+    'scale': 3,
+    'delta_location': 3,
+    'delta_rotation_euler': 3,
+    'delta_rotation_quaternion': 4,
+    'delta_scale': 3,
+}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def has_external_motion(obj):
+    if obj.constraints or getattr(obj, "rigid_body", None):
+        return True
+
+    anim = obj.animation_data
+    if anim and (anim.drivers or any(not track.mute for track in anim.nla_tracks)):
+        return True
+
+    return False
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def has_static_parent(obj):
+    parent = obj.parent
+    while parent:
+        if has_external_motion(parent) or (parent.animation_data and parent.animation_data.action):
+            return False
+        parent = parent.parent
+    return True
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: returns the transform F-curves of an object, grouped by data path and array index, but only if its world
+#      matrix depends on nothing else than its own action; constraints, drivers, NLA strips, physics or moving
+#      parents make it return None, and then we need to let the depsgraph do the work for us
+#-------------------------------------------------------------------------------------------------------------------------------
+def transform_fcurves(obj):
+    if has_external_motion(obj) or not has_static_parent(obj):
+        return None
+
+    if obj.parent and obj.parent_type != 'OBJECT':
+        return None
+
+    anim = obj.animation_data
+    action = anim.action if anim else None
+
+    if action and len(getattr(action, "slots", [])) > 1:
+        return None
+
+    # swy: a partial influence, or any blending but plain replace, mixes the action with the channel defaults
+    #      the way the NLA does; the F-curve values alone are not what ends up in the matrix then
+    if anim and (getattr(anim, "action_influence", 1.0) != 1.0 or getattr(anim, "action_blend_type", 'REPLACE') != 'REPLACE'):
+        return None
+
+    channels = {}
+    for fcurve in iter_action_fcurves(action):
+        if fcurve.data_path in TRANSFORM_DATA_PATHS and not fcurve.mute:
+            channels.setdefault(fcurve.data_path, {})[fcurve.array_index] = fcurve
+
+    return channels
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: F-curves with only linear (or only constant) keys, no modifiers and flat extrapolation are looked up for
+#      every frame at once from their keyframe arrays; béziers, easing and cycles go through fcurve.evaluate()
+#-------------------------------------------------------------------------------------------------------------------------------
+def fcurve_values(fcurve, frames):
+    points = fcurve.keyframe_points
+    if len(points) and not fcurve.modifiers and fcurve.extrapolation == 'CONSTANT':
+        interpolations = {point.interpolation for point in list(points)[:-1]}
+        if interpolations <= {'LINEAR'} or interpolations == {'CONSTANT'}:
+            keys = foreach_array(points, 'co', 2, dtype=np.float64)
+            if interpolations == {'CONSTANT'}:
+                return keys[np.maximum(np.searchsorted(keys[:, 0], frames, side='right') - 1, 0), 1]
+            return np.interp(frames, keys[:, 0], keys[:, 1])
+
+    return np.fromiter((fcurve.evaluate(frame) for frame in frames.tolist()), dtype=np.float64, count=len(frames))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def axis_matrices(angles, axis):
+    cos, sin = np.cos(angles), np.sin(angles)
+    matrices = np.zeros((len(angles), 3, 3))
+    first, second = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}[axis]
+    matrices[:, 'XYZ'.index(axis), 'XYZ'.index(axis)] = 1.0
+    matrices[:, first, first] = cos
+    matrices[:, second, second] = cos
+    matrices[:, first, second] = -sin
+    matrices[:, second, first] = sin
+    return matrices
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: Blender applies the axes in the order they are written in, so an 'XYZ' euler is Z @ Y @ X
+#-------------------------------------------------------------------------------------------------------------------------------
+def euler_matrices(angles, order):
+    matrices = np.broadcast_to(np.eye(3), (len(angles), 3, 3))
+    for axis in order:
+        matrices = axis_matrices(angles[:, 'XYZ'.index(axis)], axis) @ matrices
+    return matrices
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: (w, x, y, z) rows; they get normalized first like Blender does, a zero quaternion stays the identity
+#-------------------------------------------------------------------------------------------------------------------------------
+def quaternion_matrices(quaternions):
+    lengths = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    w, x, y, z = (quaternions / np.where(lengths == 0.0, 1.0, lengths)).T
+    return np.stack((
+        1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z),       2.0 * (x * z + w * y),
+        2.0 * (x * y + w * z),       1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x),
+        2.0 * (x * z - w * y),       2.0 * (y * z + w * x),       1.0 - 2.0 * (x * x + y * y),
+    ), axis=1).reshape(-1, 3, 3)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: (angle, x, y, z) rows; the axis gets normalized, and a zero axis means no rotation
+#-------------------------------------------------------------------------------------------------------------------------------
+def axis_angle_matrices(axis_angles):
+    angles, axes = axis_angles[:, 0], axis_angles[:, 1:]
+    lengths = np.linalg.norm(axes, axis=1, keepdims=True)
+    angles = np.where(lengths[:, 0] == 0.0, 0.0, angles)
+    axes = axes / np.where(lengths == 0.0, 1.0, lengths)
+
+    cos, sin = np.cos(angles)[:, None, None], np.sin(angles)[:, None, None]
+    cross = np.zeros((len(axes), 3, 3))
+    cross[:, 0, 1], cross[:, 0, 2], cross[:, 1, 2] = -axes[:, 2], axes[:, 1], -axes[:, 0]
+    cross -= cross.transpose(0, 2, 1)
+    return cos * np.eye(3) + sin * cross + (1.0 - cos) * (axes[:, :, None] * axes[:, None, :])
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: same composition as the object matrix in Blender; rotation with its delta rotation in front, scale times
+#      the delta scale, location plus the delta location, and then the (static) parent matrix on top of that.
+#      Every channel is built for the whole frame list first, and the matrices are put together in one go
+#-------------------------------------------------------------------------------------------------------------------------------
+def evaluate_transform_matrices(obj, frames, channels):
+    frames = np.asarray(list(frames), dtype=np.float64)
+    channel_values = {}
+
+    for data_path, width in TRANSFORM_DATA_PATHS.items():
+        values = np.tile(np.array(getattr(obj, data_path)[:], dtype=np.float64), (len(frames), 1))
+        for array_index, fcurve in channels.get(data_path, {}).items():
+            if array_index < width:
+                values[:, array_index] = fcurve_values(fcurve, frames)
+        channel_values[data_path] = values
+
+    if obj.parent:
+        parent_matrix = np.array(obj.parent.matrix_world @ obj.matrix_parent_inverse)
+    else:
+        parent_matrix = np.eye(4)
+
+    rotation_mode = obj.rotation_mode
+    if rotation_mode == 'QUATERNION':
+        rotation = (
+            quaternion_matrices(channel_values['delta_rotation_quaternion'])
+            @ quaternion_matrices(channel_values['rotation_quaternion'])
+        )
+    elif rotation_mode == 'AXIS_ANGLE':
+        rotation = axis_angle_matrices(channel_values['rotation_axis_angle'])
+    else:
+        rotation = (
+            euler_matrices(channel_values['delta_rotation_euler'], rotation_mode)
+            @ euler_matrices(channel_values['rotation_euler'], rotation_mode)
+        )
+
+    local = np.zeros((len(frames), 4, 4))
+    local[:, :3, :3] = rotation * (channel_values['scale'] * channel_values['delta_scale'])[:, None, :]
+    local[:, :3, 3] = channel_values['location'] + channel_values['delta_location']
+    local[:, 3, 3] = 1.0
+
+    return (parent_matrix @ local).reshape(-1, 16)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the writers register every per-frame value they are going to need as a track, and then we walk the
+#      timeline once; each frame is evaluated a single time, no matter how many objects want a sample from it
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a sampler can be shared by several exports of the same scene; tracks are stored per key and frame list,
+#      so a track asked for again with the same frames is reused, and a sweep only samples what is still pending
+class FrameSampler:
+    def __init__(self, scene):
+        self.scene = scene
+        self.tracks = {}
+        self.current = {}
+        self.frame_set_count = 0
+        self.direct_track_count = 0
+
+    def entry(self, key, frames):
+        frames = np.asarray(frames, dtype=np.int64)
+        entry = (key, frames.tobytes())
+        self.current[key] = entry
+        return entry, frames
+
+    def add_track(self, key, frames, width, capture):
+        entry, frames = self.entry(key, frames)
+        if entry not in self.tracks:
+            self.tracks[entry] = (frames, np.zeros((len(frames), width)), capture)
+
+    def set_track(self, key, frames, values):
+        entry, frames = self.entry(key, frames)
+        self.tracks[entry] = (frames, np.asarray(values, dtype=np.float64), None)
+
+    # swy: objects that only follow their own action get their matrices straight from the F-curves; the rest
+    #      are sampled from the depsgraph during the sweep, like any other track
+    def add_transform_track(self, key, obj, frames):
+        entry, frames = self.entry(key, frames)
+        if entry in self.tracks:
+            return
+
+        channels = transform_fcurves(obj)
+        if channels is None:
+            self.add_track(key, frames, 16, lambda: matrix_values(obj.matrix_world))
+        else:
+            self.set_track(key, frames, evaluate_transform_matrices(obj, frames, channels))
+            self.direct_track_count += 1
+
+    def has_track(self, key):
+        return key in self.current
+
+    def track(self, key):
+        frames, values, _ = self.tracks[self.current[key]]
+        return frames, values
+
+    def sweep(self):
+        for _ in self.sweep_steps():
+            pass
+
+    # swy: the same walk, handing control back every few frames with (frames done, frame count); lets a
+    #      modal export keep the UI alive and be cancelled halfway through a long timeline
+    def sweep_steps(self, batch=8):
+        requests = {}
+        for entry, (frames, values, capture) in self.tracks.items():
+            if capture is None:
+                continue
+            self.tracks[entry] = (frames, values, None)
+            for row, frame in enumerate(frames.tolist()):
+                requests.setdefault(frame, []).append((values, row, capture))
+
+        timeline = sorted(requests)
+        for done, frame in enumerate(timeline, start=1):
+            self.scene.frame_set(frame)
+            self.frame_set_count += 1
+            for values, row, capture in requests[frame]:
+                values[row] = capture()
+            if done % batch == 0 or done == len(timeline):
+                yield done, len(timeline)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: everything an export pulls out of the scene that does not depend on the output format; exporting
+#      the same scene to several formats in one go hands the same session to each of them, so the scene
+#      and instance indices, the evaluated meshes, the keyframe scans and the sampled tracks are only
+#      gathered once. Meshes and instance matrices depend on the frame, so those are kept per frame.
+#-------------------------------------------------------------------------------------------------------------------------------
+class ExportSession:
+    def __init__(self, context=None, geometry_caches=None):
+        context = context or bpy.context
+        self.scene = context.scene
+        self.depsgraph = context.evaluated_depsgraph_get()
+        self.scene_index = SceneIndex(self.scene)
+        self.keyframes = KeyframeIndex(self.scene)
+        self.sampler = FrameSampler(self.scene)
+        self.instance_indices = {}
+
+        # swy: geometry caches can outlive a session (see eland_live.py); whatever they still miss gets read
+        #      from this session's depsgraph
+        self.geometry_caches = {} if geometry_caches is None else geometry_caches
+        for cache in self.geometry_caches.values():
+            cache.depsgraph = self.depsgraph
+
+    def instance_index(self):
+        frame = self.scene.frame_current
+        if frame not in self.instance_indices:
+            self.instance_indices[frame] = InstanceIndex(self.depsgraph)
+        return self.instance_indices[frame]
+
+    # swy: a cache that also extracted skin influences can serve the exports that do not need them
+    def geometry_cache(self, apply_modifiers=True, skin=False):
+        frame = self.scene.frame_current
+        skinned = self.geometry_caches.get((frame, apply_modifiers, True))
+        if skinned is not None:
+            return skinned
+
+        key = (frame, apply_modifiers, skin)
+        if key not in self.geometry_caches:
+            self.geometry_caches[key] = GeometryCache(self.depsgraph, apply_modifiers, skin)
+        return self.geometry_caches[key]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the fragment cache every exporter shares, set up from the add-on preferences (where the directory and
+#      its size budget can be changed, and the cache inspected and cleared)
+#-------------------------------------------------------------------------------------------------------------------------------
+def fragment_cache():
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is None or addon.preferences is None:
+        return FragmentCache()
+    prefs = addon.preferences
+    return FragmentCache(bpy.path.abspath(prefs.cache_directory) or None, prefs.cache_budget * 1024 * 1024)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def rotation_quaternions(matrices):
+    m = np.asarray(matrices, dtype=np.float64)
+    diagonal = np.stack((m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis=1)
+    trace = diagonal.sum(axis=1)
+
+    # swy: pick the numerically safest of the four classic conversions for every matrix
+    candidates = np.stack((
+        np.stack((1.0 + trace, m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0], m[:, 1, 0] - m[:, 0, 1]), axis=1),
+        np.stack((m[:, 2, 1] - m[:, 1, 2], 1.0 + 2.0 * diagonal[:, 0] - trace, m[:, 0, 1] + m[:, 1, 0], m[:, 0, 2] + m[:, 2, 0]), axis=1),
+        np.stack((m[:, 0, 2] - m[:, 2, 0], m[:, 0, 1] + m[:, 1, 0], 1.0 + 2.0 * diagonal[:, 1] - trace, m[:, 1, 2] + m[:, 2, 1]), axis=1),
+        np.stack((m[:, 1, 0] - m[:, 0, 1], m[:, 0, 2] + m[:, 2, 0], m[:, 1, 2] + m[:, 2, 1], 1.0 + 2.0 * diagonal[:, 2] - trace), axis=1),
+    ), axis=1)
+
+    choice = np.argmax(np.column_stack((trace, diagonal)), axis=1)
+    quaternions = candidates[np.arange(len(m)), choice]
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+
+    # swy: keep neighbouring samples in the same hemisphere, so that blending between them takes the short way
+    signs = np.sign(np.einsum('ij,ij->i', quaternions[1:], quaternions[:-1]))
+    signs[signs == 0] = 1.0
+    quaternions[1:] *= np.cumprod(signs)[:, None]
+    return quaternions
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: splits the rows of baked 3x3 matrices into their scale and their pure rotation part
+#-------------------------------------------------------------------------------------------------------------------------------
+def matrix_rotation_scale(matrices):
+    matrices = np.asarray(matrices, dtype=np.float64)
+    scales = np.linalg.norm(matrices, axis=2)
+    scales[np.linalg.det(matrices) < 0.0, 0] *= -1.0
+    rotations = matrices / np.where(scales == 0.0, 1.0, scales)[:, :, None]
+    return rotations, scales
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: Ramer-Douglas-Peucker over baked transform keys; the first and last key of every track always stay, and we
+#      keep adding the worst key of each span until blending the remaining ones (lerp for position and scale, nlerp
+#      for the rotation) lands within the requested error everywhere. Every span is refined at the same time,
+#      and tracks can be concatenated and told apart by their id, so the whole thing is a handful of array passes
+#-------------------------------------------------------------------------------------------------------------------------------
+def reduce_transform_keys(ticks, matrices, positions, position_error, rotation_error, track_ids=None):
+    ticks = np.asarray(ticks, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    count = len(ticks)
+    keep = np.zeros(count, dtype=bool)
+
+    if count == 0:
+        return keep
+
+    track_ids = np.zeros(count, dtype=np.int64) if track_ids is None else np.asarray(track_ids)
+    boundaries = np.flatnonzero(np.diff(track_ids)) + 1
+    keep[0] = keep[-1] = True
+    keep[boundaries] = keep[boundaries - 1] = True
+
+    rotations, scales = matrix_rotation_scale(matrices)
+    quaternions = rotation_quaternions(rotations)
+    position_error = max(position_error, 1e-12)
+    rotation_error = max(rotation_error, 1e-12)
+    indices = np.arange(count)
+
+    while True:
+        kept = np.flatnonzero(keep)
+        if len(kept) == count:
+            break
+
+        segment = np.minimum(np.searchsorted(kept, indices, side='right') - 1, len(kept) - 2)
+        a, b = kept[segment], kept[segment + 1]
+
+        span = ticks[b] - ticks[a]
+        span[span == 0.0] = 1.0
+        t = ((ticks - ticks[a]) / span)[:, None]
+
+        position_deviation = np.linalg.norm(positions - (positions[a] + (positions[b] - positions[a]) * t), axis=1)
+        scale_deviation = np.linalg.norm(scales - (scales[a] + (scales[b] - scales[a]) * t), axis=1)
+
+        q_a = quaternions[a]
+        q_b = quaternions[b] * np.sign(np.einsum('ij,ij->i', q_a, quaternions[b]) + 1e-30)[:, None]
+        blended = q_a + (q_b - q_a) * t
+        blended /= np.linalg.norm(blended, axis=1, keepdims=True)
+        cosine = np.clip(np.abs(np.einsum('ij,ij->i', blended, quaternions)), 0.0, 1.0)
+        rotation_deviation = 2.0 * np.arccos(cosine)
+
+        error = np.maximum(
+            np.maximum(position_deviation, scale_deviation) / position_error,
+            rotation_deviation / rotation_error
+        )
+        error[keep] = 0.0
+
+        worst = np.zeros(len(kept) - 1)
+        np.maximum.at(worst, segment, error)
+        candidates = np.flatnonzero((error > 1.0) & (error == worst[segment]))
+        if not len(candidates):
+            break
+
+        _, first = np.unique(segment[candidates], return_index=True)
+        keep[candidates[first]] = True
+
+    return keep
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def matrix_values(matrix):
+    return [value for row in matrix for value in row]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def values_matrix(values):
+    return Matrix(np.reshape(values, (4, 4)).tolist())
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the 3x3 part of a matrix row by row, followed by its translation; the way EuroLand lists its transforms
+#-------------------------------------------------------------------------------------------------------------------------------
+def matrix_rows(matrix):
+    return (*matrix[0][:3], *matrix[1][:3], *matrix[2][:3], *matrix.translation)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def active_color_layer(mesh):
     if hasattr(mesh, "color_attributes") and mesh.color_attributes:
-        active = mesh.color_attributes.active_color or mesh.color_attributes.active
-        return active.data if active else None
+        return mesh.color_attributes.active_color or mesh.color_attributes.active
 
     if mesh.vertex_colors:
-        active = mesh.vertex_colors.active
-        return active.data if active else None
+        return mesh.vertex_colors.active
 
     return None
 
+#-------------------------------------------------------------------------------------------------------------------------------
+def color_layer_data(mesh):
+    active = active_color_layer(mesh)
+    return active.data if active else None
+
 #-------------------------------------------------------------------------------------------------------------------------------
 def color_layers(mesh):
     if hasattr(mesh, "color_attributes") and mesh.color_attributes:
@@ -98,6 +807,37 @@ def material_texture_path(mat):
 def material_has_texture(mat):
     return bool(material_texture_path(mat))
 
+#-------------------------------------------------------------------------------------------------------------------------------
+def material_record(mat):
+    if mat is None:
+        return MaterialRecord()
+
+    mat_wrap = material_wrap(mat)
+    tex_wrap = getattr(mat_wrap, "base_color_texture", None) if mat_wrap else None
+    image = tex_wrap.image if tex_wrap else None
+
+    self_illumination = 0.0
+    if mat_wrap:
+        emission_color = getattr(mat_wrap, "emission_color", (0.0, 0.0, 0.0))
+        emission_level = max(emission_color[:3]) if emission_color else 0.0
+        self_illumination = max(0.0, min(mat_wrap.emission_strength * emission_level, 1.0))
+
+    return MaterialRecord(
+        name=mat.name,
+        color=mat_wrap.base_color[:3] if mat_wrap else mat.diffuse_color[:3],
+        alpha=mat_wrap.alpha if mat_wrap else mat.diffuse_color[3],
+        texture=bpy.path.abspath(image.filepath) if image else None,
+        image_name=image.name if image else None,
+        blend_method=getattr(mat, "blend_method", "OPAQUE"),
+        metallic=mat_wrap.metallic if mat_wrap else 0.0,
+        specular=mat_wrap.specular if mat_wrap else 0.0,
+        roughness=mat_wrap.roughness if mat_wrap else 0.5,
+        self_illumination=self_illumination,
+        twosided=not getattr(mat, "use_backface_culling", False),
+        shader=str(mat["eif_shader"]) if "eif_shader" in mat else None,
+        euro_shader=str(mat["euro_shader"]) if "euro_shader" in mat else None
+    )
+
 #-------------------------------------------------------------------------------------------------------------------------------
 def adjust_rgb(r, g, b, a, brightness_scale = 10):
     r = min(max((r * brightness_scale), 0), 255)
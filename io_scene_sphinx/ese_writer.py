@@ -0,0 +1,570 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+ESE text writer; turns a SceneModel filled in by ese_export into the actual file contents, without touching bpy.
+The heavy per-object blocks (mesh, skin and morph targets) are module-level functions, so they can also be
+formatted in a worker process or spliced in from the fragment cache.
+"""
+
+import numpy as np
+from math import degrees
+from datetime import datetime
+from .eland_format import *
+from .eland_model import *
+from .eland_parallel import write_section
+
+#-------------------------------------------------------------------------------------------------------------------------------
+TEXTURE_VERTEX_COLOR_SCALE = 0.5
+TICK_FREQUENCY = 4800
+SCENE_LIGHT_SCALE = 1.0
+TEXTURED_DIFFUSE_SCALE = 0.5
+SOLID_DIFFUSE_SCALE = 1.0
+MAP_AMOUNT_SCALE = 1.0
+
+LIGHT_TYPES = {
+    'POINT': 'Omni',
+    'SPOT': 'TargetSpot',
+    'SUN': 'TargetDirect',
+    'AREA': 'TargetDirect'
+}
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def ticks_per_frame(fps):
+    return max(1, TICK_FREQUENCY // max(1, fps))
+
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the *MESH block of a *GEOMOBJECT; materials is the list of MaterialRecord in slot order, export_matrix
+#      the 4x4 array that places the cached geometry in the file
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_mesh(out, geometry, export_matrix, flip, materials,
+               TIMEVALUE,
+               EXPORT_MATERIALS,
+               EXPORT_MESH_UV,
+               EXPORT_MESH_VCOLORS,
+               EXPORT_MESH_NORMALS,
+               EXPORT_MESH_FLAGS,
+               DECIMAL_PRECISION
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+
+    unique_vertices = geometry.placed_vertices(export_matrix)
+    vertex_remap = geometry.vertex_remap
+    loop_vertices = vertex_remap[geometry.loop_vertices]
+
+    face_loops, face_polygons = geometry.triangles(flip)
+    face_vertices = loop_vertices[face_loops]
+    face_numbers = np.arange(len(face_loops))
+
+    unique_uvs = np.empty((0, 2))
+    uv_loop_indices = None
+    if EXPORT_MESH_UV and geometry.uv_active >= 0:
+        unique_uvs, uv_layer_indices = geometry.unique_uvs([geometry.uv_active], flip)
+        uv_loop_indices = uv_layer_indices[0]
+
+    unique_colors = np.empty((0, 4))
+    color_loop_indices = None
+    synthesize_texture_color = False
+    if EXPORT_MESH_VCOLORS and geometry.color_active >= 0:
+        unique_colors, color_layer_indices = geometry.unique_colors([geometry.color_active], flip)
+        color_loop_indices = color_layer_indices[0]
+    elif any(record.texture for record in materials):
+        synthesize_texture_color = True
+        unique_colors = np.array([(TEXTURE_VERTEX_COLOR_SCALE, TEXTURE_VERTEX_COLOR_SCALE, TEXTURE_VERTEX_COLOR_SCALE, 1.0)])
+
+    out.write('\t*MESH {\n')
+    out.write('\t\t*TIMEVALUE %d\n' % TIMEVALUE)
+    out.write('\t\t*MESH_NUMVERTEX %u\n' % len(unique_vertices))
+    out.write('\t\t*MESH_NUMFACES %u\n' % len(face_loops))
+
+    out.write('\t\t*MESH_VERTEX_LIST {\n')
+    write_rows(out, f'\t\t\t*MESH_VERTEX  %5d\t{df}\t{df}\t{df}\n', indexed_rows(unique_vertices))
+    out.write('\t\t}\n')
+
+    out.write('\t\t*MESH_FACE_LIST {\n')
+    face_smoothing = geometry.smooth[face_polygons]
+    write_rows(
+        out,
+        '\t\t\t*MESH_FACE    %3d:    A: %6d B: %6d C: %6d'
+        '    AB: %-6d BC: %-6d CA: %-6d  *MESH_SMOOTHING %u  *MESH_MTLID %-3d\n',
+        np.column_stack((
+            face_numbers, face_vertices,
+            triangle_edge_visibility(geometry.loop_start, geometry.loop_total, face_loops, face_polygons),
+            face_smoothing, polygon_material_indices(geometry.material_indices, materials)[face_polygons]
+        ))
+    )
+    out.write('\t\t}\n')
+
+    if EXPORT_MATERIALS and materials:
+        out.write('\t\t*SHADER_COUNT\t%d\n' % len(materials))
+        out.write('\t\t*SHADER_LIST {\n')
+        for material_index, record in enumerate(materials):
+            out.write('\t\t\t*SHADER\t%d {\n' % material_index)
+            out.write('\t\t\t\t%d\t%s\n' % (material_index, record.shader_rule('euro_shader', 'shader')))
+            out.write('\t\t\t}\n')
+        out.write('\t\t}\n')
+
+    if EXPORT_MESH_UV:
+        out.write('\t\t*MESH_NUMTVERTEX %u\n' % len(unique_uvs))
+        if len(unique_uvs):
+            out.write('\t\t*MESH_TVERTLIST {\n')
+            write_rows(
+                out, f'\t\t\t*MESH_TVERT %5d\t{df}\t{df}\t{df}\n',
+                indexed_rows(np.column_stack((unique_uvs, np.zeros(len(unique_uvs)))))
+            )
+            out.write('\t\t}\n')
+
+            out.write('\t\t*MESH_NUMTVFACES %d\n' % len(face_loops))
+            out.write('\t\t*MESH_TFACELIST {\n')
+            write_rows(
+                out, '\t\t\t*MESH_TFACE %-3d\t%d\t%d\t%d\n',
+                np.column_stack((face_numbers, uv_loop_indices[face_loops]))
+            )
+            out.write('\t\t}\n')
+
+    if EXPORT_MESH_VCOLORS or synthesize_texture_color:
+        out.write('\t\t*MESH_NUMCVERTEX %u\n' % len(unique_colors))
+        if len(unique_colors):
+            out.write('\t\t*MESH_CVERTLIST {\n')
+            write_rows(out, f'\t\t\t*MESH_VERTCOL %5d\t{df}\t{df}\t{df}\n', indexed_rows(unique_colors[:, :3]))
+            out.write('\t\t}\n')
+
+            if synthesize_texture_color:
+                color_face_indices = np.zeros_like(face_vertices)
+            else:
+                color_face_indices = color_loop_indices[face_loops]
+
+            out.write('\t\t*MESH_NUMCVFACES %d\n' % len(face_loops))
+            out.write('\t\t*MESH_CFACELIST {\n')
+            write_rows(
+                out, '\t\t\t*MESH_CFACE %-3d\t%d\t%d\t%d\n',
+                np.column_stack((face_numbers, color_face_indices))
+            )
+            out.write('\t\t}\n')
+
+    if EXPORT_MESH_NORMALS:
+        face_normals = geometry.placed_normals(export_matrix, flip)[face_polygons]
+        out.write('\t\t*MESH_NORMALS {\n')
+        write_rows(
+            out,
+            f'\t\t\t*MESH_FACENORMAL %-3d\t{df}\t{df}\t{df}\n'
+            + f'\t\t\t\t*MESH_VERTEXNORMAL %-3d\t{df}\t{df}\t{df}\n' * 3,
+            np.column_stack((
+                face_numbers, face_normals,
+                face_vertices[:, 0], face_normals,
+                face_vertices[:, 1], face_normals,
+                face_vertices[:, 2], face_normals
+            ))
+        )
+        out.write('\t\t}\n')
+
+    if EXPORT_MESH_FLAGS:
+        out.write('\t\t*MESH_NUMFACEFLAGS %u\n' % len(face_loops))
+        out.write('\t\t*MESH_FACEFLAGLIST {\n')
+        if geometry.face_flags is not None:
+            flag_values = geometry.face_flags[face_polygons]
+            flagged = np.flatnonzero(flag_values)
+            write_rows(out, '\t\t\t*MESH_FACEFLAG %u %u\n', np.column_stack((flagged, flag_values[flagged])))
+        out.write('\t\t}\n')
+
+        out.write('\t\t*MESH_VERTFLAGSLIST {\n')
+        if geometry.vertex_flags is not None:
+            flag_values = geometry.vertex_flags[:len(vertex_remap)]
+            flagged = np.flatnonzero(flag_values)
+            write_rows(out, '\t\t\t*VFLAG %u %u\n', np.column_stack((vertex_remap[flagged], flag_values[flagged])))
+        out.write('\t\t}\n')
+
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: offsets/bones/weights hold the influences of every exported (welded) vertex in CSR form
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_skin_data(out, bone_names, offsets, bones, weights, DECIMAL_PRECISION):
+    df = f'%.{DECIMAL_PRECISION}f'
+    counts = np.diff(offsets)
+    skinned = np.flatnonzero(counts)
+
+    out.write('\t*SKIN_DATA {\n')
+    out.write('\t\t*BONE_LIST {\n')
+    for bone_index, bone_name in enumerate(bone_names):
+        out.write('\t\t\t*BONE %u "%s"\n' % (bone_index, bone_name))
+    out.write('\t\t}\n')
+
+    out.write('\t\t*SKIN_VERTEX_DATA {\n')
+    write_ragged_rows(
+        out, '\t\t\t*VERTEX %5u %u', f' %2u {df}', '\n',
+        np.column_stack((skinned, counts[skinned])),
+        np.concatenate(([0], np.cumsum(counts[skinned]))),
+        np.column_stack((bones, weights))
+    )
+    out.write('\t\t}\n')
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: targets is a list of (name, coordinates) pairs, already placed with the export matrix of their mesh
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_morph_list(out, targets, DECIMAL_PRECISION):
+    df = f'%.{DECIMAL_PRECISION}f'
+
+    out.write('*MORPH_LIST {\n')
+    for name, coordinates in targets:
+        out.write('\t*MORPH_TARGET "%s" %u {\n' % (name, len(coordinates)))
+        write_rows(out, f'\t\t{df}\t{df}\t{df}\n', coordinates)
+        out.write('\t}\n')
+    out.write('}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_scene_data(out, model, df):
+    ambient = scaled_color(model.ambient, SCENE_LIGHT_SCALE)
+
+    out.write("*SCENE {\n")
+    out.write('\t*SCENE_FILENAME "%s"\n' % model.filepath)
+    out.write('\t*SCENE_FIRSTFRAME %s\n' % model.frame_start)
+    out.write('\t*SCENE_LASTFRAME %s\n' % model.frame_end)
+    out.write('\t*SCENE_FRAMESPEED %s\n' % model.fps)
+    out.write('\t*SCENE_TICKSPERFRAME %s\n' % ticks_per_frame(model.fps))
+    out.write(f'\t*SCENE_BACKGROUND_STATIC {df} {df} {df}\n' % ambient)
+    out.write(f'\t*SCENE_AMBIENT_STATIC {df} {df} {df}\n' % ambient)
+
+    out.write('\t*SCENE_UDPROPS {\n')
+    out.write('\t\t*PROP_COUNT\t%d\n' % len(model.properties))
+    for index, (name, type_name, value) in enumerate(model.properties):
+        out.write('\t\t*PROP\t%d\t"%s"\t"%s"\t"%s"\n' % (index, name, type_name, value))
+    out.write('\t}\n')
+    out.write("}\n\n")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: materials without a node tree have no metallic, specular or emission to speak of, so those come out as
+#      zero either way; textured ones get a mid grey diffuse, the texture provides the actual color
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_material_data(out, record, tab_level, include_texture, df):
+    tab = '\t' * tab_level
+    use_mirror = record.metallic > 0.001
+    textured = include_texture and record.image_name is not None
+
+    if textured:
+        diffuse = (TEXTURED_DIFFUSE_SCALE, TEXTURED_DIFFUSE_SCALE, TEXTURED_DIFFUSE_SCALE)
+    else:
+        diffuse = scaled_color(record.color, SOLID_DIFFUSE_SCALE)
+    specular = record.specular if use_mirror else 0.0
+
+    out.write(f'{tab}*MATERIAL_NAME "%s"\n' % record.name)
+    out.write(f'{tab}*MATERIAL_CLASS "Standard"\n')
+    out.write(f'{tab}*MATERIAL_AMBIENT {df} {df} {df}\n' % (0.0, 0.0, 0.0))
+    out.write(f'{tab}*MATERIAL_DIFFUSE {df} {df} {df}\n' % diffuse)
+    out.write(f'{tab}*MATERIAL_SPECULAR {df} {df} {df}\n' % (specular, specular, specular))
+    out.write(f'{tab}*MATERIAL_SHINE %.1f\n' % ((1.0 - record.roughness) if use_mirror else 0.0))
+    out.write(f'{tab}*MATERIAL_SHINESTRENGTH %.1f\n' % 0.0)
+    out.write(f'{tab}*MATERIAL_TRANSPARENCY %.1f\n' % (1.0 - record.alpha))
+    out.write(f'{tab}*MATERIAL_WIRESIZE %.1f\n' % 1.0)
+    out.write(f'{tab}*MATERIAL_SHADING Blinn\n')
+    out.write(f'{tab}*MATERIAL_XP_FALLOFF %.1f\n' % 0.0)
+    out.write(f'{tab}*MATERIAL_SELFILLUM %.1f\n' % record.self_illumination)
+    out.write(f'{tab}*MATERIAL_FALLOFF In\n')
+    out.write(f'{tab}*MATERIAL_XP_TYPE Filter\n')
+
+    if textured:
+        out.write(f'{tab}*MAP_DIFFUSE {{\n')
+        out.write(f'{tab}\t*MAP_NAME "%s"\n' % record.image_name)
+        out.write(f'{tab}\t*MAP_CLASS "Bitmap"\n')
+        out.write(f'{tab}\t*MAP_SUBNO 1\n')
+        out.write(f'{tab}\t*MAP_AMOUNT %.2f\n' % (record.metallic if use_mirror else MAP_AMOUNT_SCALE))
+        out.write(f'{tab}\t*BITMAP "%s"\n' % record.texture)
+        out.write(f'{tab}\t*MAP_TYPE Screen\n')
+        out.write(f'{tab}\t*UVW_U_OFFSET %.1f\n' % 0.0)
+        out.write(f'{tab}\t*UVW_V_OFFSET %.1f\n' % 0.0)
+        out.write(f'{tab}\t*UVW_U_TILING %.1f\n' % 1.0)
+        out.write(f'{tab}\t*UVW_V_TILING %.1f\n' % 1.0)
+        out.write(f'{tab}\t*UVW_ANGLE %.1f\n' % 0.0)
+        out.write(f'{tab}\t*UVW_BLUR %.1f\n' % 1.0)
+        out.write(f'{tab}\t*UVW_BLUR_OFFSET %.1f\n' % 0.0)
+        out.write(f'{tab}\t*UVW_NOUSE_AMT %.1f\n' % 1.0)
+        out.write(f'{tab}\t*UVW_NOISE_SIZE %.1f\n' % 1.0)
+        out.write(f'{tab}\t*UVW_NOISE_LEVEL 1\n')
+        out.write(f'{tab}\t*UVW_NOISE_PHASE %.1f\n' % 0.0)
+        out.write(f'{tab}\t*BITMAP_FILTER Pyramidal\n')
+        out.write(f'{tab}}}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: one entry per mesh object; objects with more than one material get a multi-material holding them all
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_material_list(out, model, df):
+    out.write("*MATERIAL_LIST {\n")
+    out.write("\t*MATERIAL_COUNT %d\n" % len(model.material_lists))
+
+    for index, keys in enumerate(model.material_lists.values()):
+        records = [model.material(key) for key in keys]
+        out.write("\t*MATERIAL %d {\n" % index)
+
+        if len(records) == 1:
+            write_material_data(out, records[0], 2, True, df)
+        else:
+            write_material_data(out, records[0], 2, False, df)
+            out.write("\t\t*MATERIAL_MULTIMAT\n")
+            out.write("\t\t*NUMSUBMTLS %d\n" % len(records))
+
+            for submat_index, record in enumerate(records):
+                out.write("\t\t*SUBMATERIAL %d {\n" % submat_index)
+                write_material_data(out, record, 3, True, df)
+                out.write("\t\t}\n")
+
+        out.write("\t}\n")
+
+    out.write("}\n")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: values holds the EuroLand 3x3 rows, the position, the rotation angles and the scale, in that order
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_tm_node(out, name, values, df, block='NODE_TM'):
+    values = values.tolist()
+
+    out.write('\t*%s {\n' % block)
+    out.write('\t\t*NODE_NAME "%s"\n' % name)
+    out.write('\t\t*INHERIT_POS %d %d %d\n' % (0, 0, 0))
+    out.write('\t\t*INHERIT_ROT %d %d %d\n' % (0, 0, 0))
+    out.write('\t\t*INHERIT_SCL %d %d %d\n' % (1, 1, 1))
+    out.write(f'\t\t*TM_ROW0 {df} {df} {df}\n' % tuple(values[0:3]))
+    out.write(f'\t\t*TM_ROW1 {df} {df} {df}\n' % tuple(values[3:6]))
+    out.write(f'\t\t*TM_ROW2 {df} {df} {df}\n' % tuple(values[6:9]))
+    out.write(f'\t\t*TM_ROW3 {df} {df} {df}\n' % tuple(values[9:12]))
+    out.write(f'\t\t*TM_POS {df} {df} {df}\n' % tuple(values[9:12]))
+    out.write(f'\t\t*TM_ROTANGLE {df} {df} {df}\n' % tuple(values[12:15]))
+    out.write(f'\t\t*TM_SCALE {df} {df} {df}\n' % tuple(values[15:18]))
+    out.write(f'\t\t*TM_SCALEANGLE {df} {df} {df}\n' % (0, 0, 0))
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the keys come already reduced from the extraction, as rows of tick, 3x3 matrix and position
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_animation_node(out, name, frame_rows, df):
+    out.write('\t*TM_ANIMATION {\n')
+    out.write('\t\t*TM_ANIMATION "%s"\n' % name)
+    out.write('\t\t*TM_ANIM_FRAMES {\n')
+    write_rows(out, '\t\t\t*TM_FRAME  %-5d' + f' {df} {df} {df}' * 4 + '\n', frame_rows)
+    out.write('\t\t}\n')
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_node_header(out, block, node):
+    out.write("*%s {\n" % block)
+    out.write('\t*NODE_NAME "%s"\n' % node.name)
+    if node.parent:
+        out.write('\t*NODE_PARENT "%s"\n' % node.parent)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: sampled settings only get a key when they change from the previous one
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_settings_track(out, model, track, write_settings):
+    ticks = ticks_per_frame(model.fps)
+    previous = None
+    frames, settings = track
+    for frame, current in zip(frames.tolist(), settings.tolist()):
+        if previous != current:
+            write_settings(current, (frame - model.frame_start) * ticks)
+            previous = current
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_morph_data(out, names, track, DECIMAL_PRECISION):
+    df = f'%.{DECIMAL_PRECISION}f'
+    _, key_values = track
+
+    out.write('\t*MORPH_DATA {\n')
+    for key_index, name in enumerate(names):
+        out.write('\t\t*MORPH_FRAMES "%s" %u {\n' % (name, len(key_values)))
+        write_rows(out, f'\t\t\t%u {df}\n', indexed_rows(key_values[:, key_index]))
+        out.write('\t\t}\n')
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_light_settings(out, light_type, settings, current_frame, df, tab_level=1):
+    tab = '\t' * tab_level
+    r, g, b, shadow_soft_size, cutoff_distance, angle = settings
+
+    out.write(f'{tab}*LIGHT_SETTINGS {{\n')
+    out.write(f'{tab}\t*TIMEVALUE %u\n' % current_frame)
+    out.write(f'{tab}\t*COLOR {df} {df} {df}\n' % (r, g, b))
+    out.write(f'{tab}\t*FAR_ATTEN {df} {df}\n' % (shadow_soft_size, cutoff_distance))
+    out.write(f'{tab}\t*HOTSPOT {df}\n' % (degrees(angle) if light_type in {'SUN', 'SPOT'} else 0.0))
+    out.write(f'{tab}}}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_camera_settings(out, settings, current_frame, df, tab_level=1):
+    tab = '\t' * tab_level
+    clip_start, clip_end, angle = settings
+
+    out.write(f'{tab}*CAMERA_SETTINGS {{\n')
+    out.write(f'{tab}\t*TIMEVALUE %u\n' % current_frame)
+    out.write(f'{tab}\t*CAMERA_NEAR {df}\n' % clip_start)
+    out.write(f'{tab}\t*CAMERA_FAR {df}\n' % clip_end)
+    out.write(f'{tab}\t*CAMERA_FOV {df}\n' % angle)
+    out.write(f'{tab}\t*CAMERA_TDIST {df}\n' % clip_end)
+    out.write(f'{tab}}}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: rows of (marker name, first keyframe, last keyframe, marker frame, timeline frame), one per shot
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_script_camera(out, shots):
+    out.write('\t*USER_DATA %u {\n' % 0)
+    out.write('\t\tCameraScript = %u\n' % 1)
+    out.write('\t\tCameraScript_numCameras = %u\n' % len(shots))
+    out.write('\t\tCameraScript_globalOffset = %u\n' % 0)
+    for index, shot in enumerate(shots, start=1):
+        out.write('\t\tCameraScript_camera%u = %s %u %u %u %u\n' % (index, *shot))
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the whole file, as a generator that yields (meshes done, mesh count) after every *GEOMOBJECT; when out
+#      is a SectionWriter the caller can drain it in between, and a modal export can show how far along it is.
+#      Mesh nodes carry their *MESH export matrix, NODE_TM/PIVOT_TM values and, when animated, their reduced
+#      TM_ANIMATION keys in transforms; settings holds the rest of what each object type writes
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_steps(out, model,
+                EXPORT_MATERIALS,
+                EXPORT_MESH_UV,
+                EXPORT_MESH_VCOLORS,
+                EXPORT_MESH_NORMALS,
+                EXPORT_MESH_FLAGS,
+                EXPORT_STATIC_FRAME,
+                DECIMAL_PRECISION
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+    material_refs = {name: index for index, name in enumerate(model.material_lists)}
+    meshes = model.nodes_of_type('MESH')
+    cameras = model.nodes_of_type('CAMERA')
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_tm_animation(out, node):
+        if 'TM_ANIMATION' in node.transforms:
+            write_animation_node(out, node.name, node.transforms['TM_ANIMATION'], df)
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_mesh_object(out, node):
+        settings = node.settings
+
+        write_node_header(out, "GEOMOBJECT", node)
+        write_tm_node(out, node.name, node.transforms['NODE_TM'], df)
+        write_tm_node(out, node.name, node.transforms['PIVOT_TM'], df, 'PIVOT_TM')
+
+        write_section(out, write_mesh, node.geometry, node.transforms['MESH'], settings['flip'],
+                      [model.material(key) for key in node.materials],
+                      TIMEVALUE=EXPORT_STATIC_FRAME,
+                      EXPORT_MATERIALS=EXPORT_MATERIALS,
+                      EXPORT_MESH_UV=EXPORT_MESH_UV,
+                      EXPORT_MESH_VCOLORS=EXPORT_MESH_VCOLORS,
+                      EXPORT_MESH_NORMALS=EXPORT_MESH_NORMALS,
+                      EXPORT_MESH_FLAGS=EXPORT_MESH_FLAGS,
+                      DECIMAL_PRECISION=DECIMAL_PRECISION)
+
+        write_tm_animation(out, node)
+        out.write(f'\t*WIREFRAME_COLOR {df} {df} {df}\n' % settings['wire_color'])
+
+        if EXPORT_MATERIALS and node.name in material_refs:
+            out.write('\t*MATERIAL_REF %d\n' % material_refs[node.name])
+
+        if 'MORPH' in node.tracks:
+            write_morph_data(out, [name for name, _ in settings['morph_targets']], node.tracks['MORPH'], DECIMAL_PRECISION)
+
+        if settings['skin']:
+            write_skin_data(out, *settings['skin'], DECIMAL_PRECISION)
+
+        out.write("}\n")
+
+        if 'MORPH' in node.tracks:
+            write_morph_list(out, settings['morph_targets'], DECIMAL_PRECISION)
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_camera_object(out, node):
+        settings = node.settings
+
+        write_node_header(out, "CAMERAOBJECT", node)
+        out.write('\t*CAMERA_TYPE target\n')
+        write_tm_node(out, node.name, node.transforms['NODE_TM'], df)
+        write_camera_settings(out, settings['camera'], EXPORT_STATIC_FRAME, df)
+
+        if 'CAMERA' in node.tracks:
+            out.write('\t*CAMERA_ANIMATION {\n')
+            write_settings_track(out, model, node.tracks['CAMERA'],
+                                 lambda current, tick: write_camera_settings(out, current, tick, df, 2))
+            out.write('\t}\n')
+            write_tm_animation(out, node)
+
+        if settings['script'] is not None:
+            write_script_camera(out, settings['script'])
+
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_light_object(out, node):
+        settings = node.settings
+        light_type = settings['type']
+
+        write_node_header(out, "LIGHTOBJECT", node)
+        out.write('\t*LIGHT_TYPE %s\n' % LIGHT_TYPES.get(light_type, 'Omni'))
+        write_tm_node(out, node.name, node.transforms['NODE_TM'], df)
+        out.write('\t*LIGHT_SHADOWS %s\n' % ("On" if settings['shadows'] else "Off"))
+        out.write('\t*LIGHT_DECAY %s\n' % ("None" if light_type == 'SUN' else "InvSquare"))
+        out.write('\t*LIGHT_AFFECT_DIFFUSE On\n')
+        out.write('\t*LIGHT_AFFECT_SPECULAR %s\n' % ("On" if settings['specular'] else "Off"))
+        out.write('\t*LIGHT_AMBIENT_ONLY Off\n')
+        write_light_settings(out, light_type, settings['light'], EXPORT_STATIC_FRAME, df)
+
+        if 'LIGHT' in node.tracks:
+            out.write('\t*LIGHT_ANIMATION {\n')
+            write_settings_track(out, model, node.tracks['LIGHT'],
+                                 lambda current, tick: write_light_settings(out, light_type, current, tick, df, 2))
+            out.write('\t}\n')
+            write_tm_animation(out, node)
+
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_plain_object(out, block, node):
+        write_node_header(out, block, node)
+        write_tm_node(out, node.name, node.transforms['NODE_TM'], df)
+        write_tm_animation(out, node)
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_bone_object(out, node):
+        out.write('*BONEOBJECT {\n')
+        out.write('\t*NODE_NAME "%s"\n' % node.name)
+        if node.parent:
+            out.write('\t*NODE_PARENT "%s"\n' % node.parent)
+        out.write('\t*NODE_BIPED_BODY\n')
+        out.write('}\n')
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    out.write("*3DSMAX_EUROEXPORT\t300\n")
+    out.write('*COMMENT "Eurocom Export Version  3.00 - %s"\n' % datetime.now().strftime("%A %B %d %Y %H:%M"))
+    out.write('*COMMENT "Version of Blender that output this file: %s"\n' % model.blender_version)
+    out.write('*COMMENT "Version of ESE Plug-in: %d.%d.%d"\n\n' % (
+        model.plugin_version[0], model.plugin_version[1], model.plugin_version[2]
+    ))
+
+    write_scene_data(out, model, df)
+
+    if EXPORT_MATERIALS:
+        write_material_list(out, model, df)
+
+    for done, node in enumerate(meshes, start=1):
+        write_mesh_object(out, node)
+        yield done, len(meshes)
+
+    for node in cameras:
+        write_camera_object(out, node)
+    for node in model.nodes_of_type('LIGHT'):
+        write_light_object(out, node)
+    for node in model.nodes_of_type('CURVE'):
+        write_plain_object(out, "SHAPEOBJECT", node)
+    for node in model.nodes_of_type('EMPTY'):
+        write_plain_object(out, "HELPEROBJECT", node)
+    for node in model.nodes_of_type('BONE'):
+        write_bone_object(out, node)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write(out, model, **options):
+    for _ in write_steps(out, model, **options):
+        pass
@@ -0,0 +1,249 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+RTG text writer; turns a SceneModel filled in by rtg_export into the actual file contents, without touching bpy.
+"""
+
+import os
+import numpy as np
+from .eland_format import *
+from .eland_model import *
+from .eland_parallel import write_section
+
+#-------------------------------------------------------------------------------------------------------------------------------
+EXPORT_TRI = True
+
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def texture_name(record):
+    return os.path.basename(record.texture).replace(" ", "_")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def material_blend(record):
+    rtg_flags = 1 if record.alpha < 0.999 or record.blend_method in {'BLEND', 'HASHED', 'CLIP'} else 0
+    blend_mode = 0
+    return record.alpha, blend_mode, rtg_flags
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_shader(out, record, shader_index, df):
+    alpha, blend_mode, rtg_flags = material_blend(record)
+    out.write('\t*SHADER_%d {\n' % shader_index)
+    out.write(f'\t\t{df} {df} {df} {df}\n' % (record.color[0], record.color[1], record.color[2], 1.0))
+
+    if record.texture:
+        out.write('\t\t%s "%s" ' % (texture_name(record), record.texture))
+    else:
+        out.write('\t\t"" "" ')
+    out.write(f'{df} %d %d\n' % (alpha, blend_mode, rtg_flags))
+    out.write('\t}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: one entry of the *MESH block; materials is the list of MaterialRecord in slot order, export_matrix the
+#      4x4 array that places the cached geometry in the file
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_mesh(out, name, geometry, export_matrix, flip, materials,
+               EXPORT_MATERIALS,
+               EXPORT_MESH_UV,
+               EXPORT_MESH_VCOLORS,
+               DECIMAL_PRECISION
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+    unique_vertices = geometry.placed_vertices(export_matrix)
+    loop_vertices = geometry.vertex_remap[geometry.loop_vertices]
+
+    out.write("\t*NAME %s\n" % name)
+    out.write('\t*VERT_XYXRGBA %d {\n' % len(unique_vertices))
+    write_rows(out, f'\t\t{df} {df} {df}\n', unique_vertices * (1.0, 1.0, -1.0))
+    out.write('\t}\n')
+
+    if EXPORT_MATERIALS and materials:
+        for mat_index, record in enumerate(materials):
+            write_shader(out, record, mat_index, df)
+
+    face_offsets, face_loops, face_polygons = geometry.face_corners(EXPORT_TRI, flip)
+    poly_material_indices = geometry.material_indices[face_polygons].tolist()
+    if geometry.face_flags is not None:
+        flag_values = geometry.face_flags[face_polygons].tolist()
+    else:
+        flag_values = [0] * len(face_polygons)
+    face_vertices = loop_vertices[face_loops].tolist()
+
+    export_uvs = EXPORT_MESH_UV and geometry.uv_active >= 0 and materials
+    if export_uvs:
+        uv_loop_items = ['%.6f %.6f' % (u, -v) for u, v in geometry.uv_rows[geometry.uv_active][face_loops].tolist()]
+        texture_names = [[texture_name(record)] if record.texture else [] for record in materials]
+
+    out.write("\t*FACE_LIST {\n")
+    face_lines = []
+    offsets = face_offsets.tolist()
+    for face_index, (first_corner, last_corner) in enumerate(zip(offsets[:-1], offsets[1:])):
+        corners = slice(first_corner, last_corner)
+        poly_material_index = poly_material_indices[face_index]
+        shader_index = poly_material_index if poly_material_index < len(materials) else 0
+        face_lines.append("\t\t*FACE %d %d %d {\n" % (last_corner - first_corner, shader_index, flag_values[face_index]))
+        face_lines.append("\t\t\t%s\n" % " ".join(map(str, face_vertices[corners])))
+
+        if export_uvs:
+            uv_items = uv_loop_items[corners] + texture_names[shader_index]
+            face_lines.append("\t\t\t%s\n" % " ".join(uv_items))
+        face_lines.append("\t\t}\n")
+    write_lines(out, face_lines)
+    out.write("\t}\n")
+
+    if EXPORT_MESH_VCOLORS and geometry.color_active >= 0 and len(geometry.color_rows[geometry.color_active]):
+        out.write("\t*FACE_VERTEX_RGB {\n")
+        colors = geometry.color_rows[geometry.color_active]
+        # swy: face corner colors follow the exported faces; point colors stay one per vertex
+        if geometry.color_corner[geometry.color_active]:
+            colors = colors[face_loops]
+        write_rows(out, f'\t\t{df} {df} {df} {df}\n', colors)
+        out.write("\t}\n")
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the whole file, as a generator that yields (meshes done, mesh count) after every mesh of the *MESH block;
+#      when out is a SectionWriter the caller can drain it in between, and a modal export can show its progress
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_steps(out, model,
+                EXPORT_MATERIALS,
+                EXPORT_SCENE_FRAMES,
+                EXPORT_CAMERA_LIGHT_ANIMS,
+                EXPORT_MESH_UV,
+                EXPORT_MESH_VCOLORS,
+                DECIMAL_PRECISION,
+                geometry_of=None
+            ):
+
+    df = f'%.{DECIMAL_PRECISION}f'
+    cameras = model.nodes_of_type('CAMERA')
+    meshes = model.nodes_of_type('MESH')
+
+    # swy: mesh nodes may come without geometry, in that case it is asked for right when the mesh gets
+    #      written, and let go of right after; that way only one of them needs to be in memory at a time
+    geometry_of = geometry_of or (lambda node: node.geometry)
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def hierarchy_name(node):
+        return node.name.replace(" ", "_")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def shape_name(node):
+        return f"{node.name}Shape"
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_material_list(out):
+        if not EXPORT_MATERIALS:
+            return
+
+        out.write("*MATERIAL {\n")
+        seen = set()
+        for node in meshes:
+            for name in node.materials:
+                if name is None or name in seen:
+                    continue
+                seen.add(name)
+                record = model.material(name)
+                out.write('\t*MATERIAL {\n')
+                out.write('\t\t*NAME "%s"\n' % record.name)
+                out.write(f'\t\t*COL_AMBIENT {df} {df} {df}\n' % (1.0, 1.0, 1.0))
+                out.write(f'\t\t*COL_DIFFUSE {df} {df} {df}\n' % record.color)
+                out.write(f'\t\t*COL_SPECULAR {df} {df} {df}\n' % (0.0, 0.0, 0.0))
+                out.write(f'\t\t*COL_EMMISION {df}\n' % 0.0)
+                out.write(f'\t\t*SHININESS {df}\n' % 0.0)
+                out.write(f'\t\t*TRANSPARENCY {df}\n' % (1.0 - record.alpha))
+                if record.texture:
+                    out.write('\t\t*MAP_DIFFUSE "%s"\n' % record.texture)
+                out.write('\t}\n')
+        out.write("}\n\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_scene_hierarchy(out):
+        out.write("*SCENE_HIERARCHY {\n")
+        for node in cameras:
+            out.write("\t%s 1 CAMERA\n" % hierarchy_name(node))
+        for node in meshes:
+            out.write("\t%s 1 MESH %s\n" % (hierarchy_name(node), shape_name(node)))
+        out.write("}\n\n")
+        out.write("*SCENE_FRAMES_PER_SECOND %u\n" % model.fps)
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    # swy: every node carries its EuroLand matrices as rows of 3x3 + translation; nodes that were found static
+    #      during the extraction only carry the first frame, and are left out of the rest
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_scene_frames(out):
+        template = '\t%s' + f' {df}' * 12 + '\n'
+        tracks = [(hierarchy_name(node), node.transforms['FRAMES'].tolist()) for node in cameras + meshes]
+
+        for row, frame in enumerate(range(model.frame_start, model.frame_end + 1)):
+            out.write("*SCENE_FRAME %u {\n" % frame)
+            for name, rows in tracks:
+                if row < len(rows):
+                    out.write(template % (name, *rows[row]))
+            out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_meshes(out):
+        out.write("*MESH {\n")
+        for done, node in enumerate(meshes, start=1):
+            geometry = geometry_of(node)
+            if geometry is not None:
+                write_section(
+                    out, write_mesh, shape_name(node), geometry, node.transforms['MESH'],
+                    bool(np.linalg.det(node.matrix) < 0.0), [model.material(name) for name in node.materials],
+                    EXPORT_MATERIALS, EXPORT_MESH_UV, EXPORT_MESH_VCOLORS, DECIMAL_PRECISION
+                )
+            yield done, len(meshes)
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_camera_list(out):
+        out.write("*CAMERA_LIST {\n")
+        for node in cameras:
+            angle, lens, clip_start, clip_end = node.settings
+            out.write(f'\t%s {df} {df} {df} {df} {df} {df}\n' % (
+                hierarchy_name(node),
+                angle,
+                angle,
+                lens,
+                clip_start,
+                clip_end,
+                1.0
+            ))
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    def write_camera_animation(out):
+        out.write("*CAMERA_ANIMATION {\n")
+        for node in cameras:
+            frames, lens = node.tracks['LENS']
+            out.write("\t%s focalLength " % hierarchy_name(node))
+            out.write("".join("%u %s " % (frame, df % value) for frame, value in zip(frames.tolist(), lens[:, 0].tolist())))
+            out.write("\n")
+        out.write("}\n")
+
+    #---------------------------------------------------------------------------------------------------------------------------
+    out.write("EUROCOM_RTG 5.01\n")
+    out.write('*COMMENT "Version of Blender that output this file: %s"\n' % model.blender_version)
+    out.write('*COMMENT "Version of RTG Plug-in: %d.%d.%d"\n\n' % (
+        model.plugin_version[0], model.plugin_version[1], model.plugin_version[2]
+    ))
+
+    write_material_list(out)
+    write_scene_hierarchy(out)
+
+    if EXPORT_SCENE_FRAMES:
+        write_scene_frames(out)
+
+    if meshes:
+        yield from write_meshes(out)
+
+    if cameras:
+        write_camera_list(out)
+        if EXPORT_CAMERA_LIGHT_ANIMS:
+            write_camera_animation(out)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write(out, model, **options):
+    for _ in write_steps(out, model, **options):
+        pass
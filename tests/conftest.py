@@ -0,0 +1,57 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+The writers, the export model and the fragment cache don't need Blender; the tests load them from the add-on
+folder as a bare package (like the workers in eland_parallel.py do), so the add-on __init__ and its bpy
+imports never run. It goes by another name, the Blender tests still get to import the real add-on.
+"""
+
+import os
+import sys
+import types
+import pytest
+import numpy as np
+
+#-------------------------------------------------------------------------------------------------------------------------------
+ADDON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "io_scene_sphinx")
+STANDALONE_PACKAGE = "sphinx_standalone"
+
+if STANDALONE_PACKAGE not in sys.modules:
+    package = types.ModuleType(STANDALONE_PACKAGE)
+    package.__path__ = [ADDON_PATH]
+    sys.modules[STANDALONE_PACKAGE] = package
+
+from sphinx_standalone.eland_model import MeshGeometry
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a unit quad split in two triangles (the flipped ones like Blender splits them), with one UV layer
+#-------------------------------------------------------------------------------------------------------------------------------
+def make_quad_geometry(**arrays):
+    geometry = dict(
+        unique_vertices=np.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], dtype=np.float32),
+        vertex_remap=np.arange(4),
+        vertex_source=np.arange(4),
+        loop_vertices=np.arange(4),
+        loop_start=np.array([0]),
+        loop_total=np.array([4]),
+        material_indices=np.array([0], dtype=np.int32),
+        smooth=np.array([False]),
+        tri_loops=np.array([(0, 1, 2), (0, 2, 3)]),
+        tri_polygons=np.array([0, 0]),
+        flipped_tri_loops=np.array([(0, 3, 2), (0, 2, 1)]),
+        flipped_tri_polygons=np.array([0, 0]),
+        uv_rows=[np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)],
+        uv_active=0,
+        color_rows=[],
+        color_corner=[],
+        color_active=-1,
+        material_names=["Mat"],
+    )
+    geometry.update(arrays)
+    return MeshGeometry(**geometry)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+@pytest.fixture
+def quad_geometry():
+    return make_quad_geometry
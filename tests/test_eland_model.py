@@ -0,0 +1,111 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+The array helpers of the export model, on hand-made data; plain CPython and NumPy, no Blender needed.
+"""
+
+import numpy as np
+from sphinx_standalone.eland_model import unique_rows, unique_layer_rows, csr_take, polygon_normals
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_unique_rows_keeps_first_appearance_order():
+    rows = np.array([(2.0, 0.0), (1.0, 0.0), (2.0, 0.0), (1.0, -0.0), (3.0, 1.0)])
+    unique, remap, source = unique_rows(rows)
+
+    assert unique.tolist() == [[2.0, 0.0], [1.0, 0.0], [3.0, 1.0]]
+    assert remap.tolist() == [0, 1, 0, 1, 2]
+    assert source.tolist() == [0, 1, 4]
+    assert np.array_equal(unique[remap], rows)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_unique_rows_of_nothing():
+    unique, remap, source = unique_rows(np.empty((0, 3)))
+    assert unique.shape == (0, 3) and len(remap) == 0 and len(source) == 0
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_unique_layer_rows_share_one_list():
+    first = np.array([(0, 0), (1, 0), (0, 0)], dtype=np.float32)
+    second = np.array([(1, 0), (5, 5), (0, 0)], dtype=np.float32)
+    unique, indices = unique_layer_rows([first, second], 2, 3)
+
+    assert unique.tolist() == [[0, 0], [1, 0], [5, 5]]
+    assert indices.tolist() == [[0, 1, 0], [1, 2, 0]]
+
+    unique, indices = unique_layer_rows([], 2, 3)
+    assert unique.shape == (0, 2) and indices.shape == (0, 3)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_csr_take_repacks_the_picked_rows():
+    offsets = np.array([0, 2, 2, 5])
+    taken, items = csr_take(offsets, np.array([2, 0, 1]))
+
+    assert taken.tolist() == [0, 3, 5, 5]
+    assert items.tolist() == [2, 3, 4, 0, 1]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_flipped_triangles_come_from_the_extraction(quad_geometry):
+    geometry = quad_geometry()
+    tri_loops, tri_polygons = geometry.triangles(flip=True)
+
+    assert tri_loops.tolist() == [[0, 3, 2], [0, 2, 1]]
+    assert tri_polygons.tolist() == [0, 0]
+    assert geometry.triangles()[0].tolist() == [[0, 1, 2], [0, 2, 3]]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_flipped_face_corners_reverse_every_polygon(quad_geometry):
+    offsets, loops, polygons = quad_geometry().face_corners(flip=True)
+    assert offsets.tolist() == [0, 4]
+    assert loops.tolist() == [0, 3, 2, 1]
+    assert polygons.tolist() == [0]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: flipped meshes list their UVs in the order the flipped corners come in, the indices still go by loop
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_flipped_uvs_dedup_in_flipped_corner_order(quad_geometry):
+    geometry = quad_geometry(uv_rows=[np.array([(0, 0), (1, 0), (0, 0), (2, 2)], dtype=np.float32)])
+
+    unique, indices = geometry.unique_uvs([0])
+    assert unique.tolist() == [[0, 0], [1, 0], [2, 2]]
+    assert indices.tolist() == [[0, 1, 0, 2]]
+
+    unique, indices = geometry.unique_uvs([0], flip=True)
+    assert unique.tolist() == [[0, 0], [2, 2], [1, 0]]
+    assert indices.tolist() == [[0, 2, 0, 1]]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_polygon_normals_of_every_polygon_size():
+    triangle = [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+    pentagon = [(0, 0, 0), (0, 2, 0), (0, 2, 2), (0, 1, 3), (0, 0, 2)]
+    degenerate = [(0, 0, 0), (1, 0, 0), (2, 0, 0)]
+    corners = np.array(triangle + pentagon + degenerate + degenerate + degenerate[:2], dtype=np.float32)
+    normals = polygon_normals(corners, np.array([0, 3, 8, 11, 16]))
+
+    assert normals.dtype == np.float32
+    assert normals.tolist() == [[0, 0, 1], [1, 0, 0], [0, 0, 0], [0, 0, 1]]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_placed_normals_come_from_the_placed_vertices(quad_geometry):
+    tilted = np.array([(0, 0, 0), (1, 0, 1), (1, 1, 1), (0, 1, 0)], dtype=np.float32)
+    normals = quad_geometry(unique_vertices=tilted).placed_normals(np.diag((2.0, 1.0, 1.0, 1.0)))
+
+    assert np.allclose(normals[0], np.array((-1.0, 0.0, 2.0)) / np.sqrt(5.0))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a mirror reverses the winding, so the normal flips with it; the writers flip the faces of mirrored
+#      meshes back, and then it points the original way again
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_placed_normals_follow_the_winding(quad_geometry):
+    geometry = quad_geometry()
+    mirror = np.diag((-1.0, 1.0, 1.0, 1.0))
+
+    assert geometry.placed_normals(mirror).tolist() == [[0.0, 0.0, -1.0]]
+    assert geometry.placed_normals(mirror, flip=True).tolist() == [[0.0, 0.0, 1.0]]
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_placed_vertices_apply_the_whole_matrix(quad_geometry):
+    matrix = np.array([(0, -1, 0, 5), (1, 0, 0, 0), (0, 0, 1, 1), (0, 0, 0, 1)], dtype=np.float64)
+    vertices = quad_geometry().placed_vertices(matrix)
+
+    assert vertices.dtype == np.float32
+    assert vertices.tolist() == [[5, 0, 1], [5, 1, 1], [4, 1, 1], [4, 0, 1]]
@@ -0,0 +1,175 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+The on-disk fragment cache, in a temporary directory; plain CPython and NumPy, no Blender needed.
+"""
+
+import os
+import types
+import shutil
+import pytest
+import numpy as np
+from sphinx_standalone import eland_cache, ese_writer
+from sphinx_standalone.eland_cache import FragmentCache, read_index, cache_stats
+from sphinx_standalone.eland_model import MaterialRecord
+
+#-------------------------------------------------------------------------------------------------------------------------------
+FIRST, SECOND, THIRD = ('%02x' % index * 20 for index in range(1, 4))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the index orders entries by last use; a clock that only moves when told to keeps that order fixed
+#-------------------------------------------------------------------------------------------------------------------------------
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(eland_cache, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_commit_merges_into_the_index(tmp_path, clock):
+    first = FragmentCache(str(tmp_path))
+    first.store(FIRST, "a" * 10)
+    first.commit()
+
+    second = FragmentCache(str(tmp_path))
+    clock.now += 1
+    second.store(SECOND, "b" * 20)
+    assert second.load(FIRST) == "a" * 10
+    assert second.load(THIRD) is None
+    second.commit()
+
+    entries, hits, misses = read_index(str(tmp_path))
+    assert entries == {FIRST: [10, 1001.0], SECOND: [20, 1001.0]}
+    assert (hits, misses) == (1, 1)
+    assert cache_stats(str(tmp_path)) == (2, 30, 1, 1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: loading a fragment counts as using it, so the one stored in between is the oldest by the time it commits
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_commit_evicts_the_least_recently_used(tmp_path, clock):
+    cache = FragmentCache(str(tmp_path), budget=25)
+    for key in (FIRST, SECOND, THIRD):
+        cache.store(key, "x" * 10)
+        clock.now += 1
+    assert cache.load(FIRST) == "x" * 10
+    cache.commit()
+
+    entries, _, _ = read_index(str(tmp_path))
+    assert entries == {FIRST: [10, 1003.0], THIRD: [10, 1002.0]}
+    assert not os.path.exists(cache.path(SECOND))
+    assert cache_stats(str(tmp_path))[:2] == (2, 20)
+
+    # swy: entries other exports left in the index count against the budget too
+    cache.store(SECOND, "y" * 10)
+    cache.commit()
+
+    entries, _, _ = read_index(str(tmp_path))
+    assert sorted(entries) == [FIRST, SECOND]
+    assert os.path.exists(cache.path(FIRST)) and not os.path.exists(cache.path(THIRD))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_counters_add_up_across_exports(tmp_path, clock):
+    cache = FragmentCache(str(tmp_path))
+    cache.store(FIRST, "a")
+    for key in (FIRST, FIRST, SECOND):
+        cache.load(key)
+    cache.commit()
+    assert (cache.hits, cache.misses, cache.used) == (0, 0, {})
+
+    for key in (FIRST, SECOND, THIRD):
+        cache.load(key)
+    cache.commit()
+
+    assert cache_stats(str(tmp_path)) == (1, 1, 3, 3)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_broken_index_reads_as_empty(tmp_path):
+    (tmp_path / "index.json").write_text("{not json", encoding="utf8")
+    assert read_index(str(tmp_path)) == ({}, 0, 0)
+
+    cache = FragmentCache(str(tmp_path))
+    cache.store(FIRST, "a")
+    cache.commit()
+    assert cache_stats(str(tmp_path)) == (1, 1, 0, 0)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: what the ESE exporter hands to write_mesh() for one mesh; every test gets its own cache, as the records
+#      are only hashed once per cache
+#-------------------------------------------------------------------------------------------------------------------------------
+MESH_OPTIONS = dict(
+    TIMEVALUE=0,
+    EXPORT_MATERIALS=True,
+    EXPORT_MESH_UV=True,
+    EXPORT_MESH_VCOLORS=False,
+    EXPORT_MESH_NORMALS=True,
+    EXPORT_MESH_FLAGS=False,
+    DECIMAL_PRECISION=6,
+)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def mesh_key(tmp_path, geometry, matrix=np.eye(4), materials=(MaterialRecord("Mat"),), **options):
+    args = (geometry, matrix, False, list(materials))
+    return FragmentCache(str(tmp_path)).key(ese_writer.write_mesh, args, dict(MESH_OPTIONS, **options))
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_key_changes_with_every_input(tmp_path, quad_geometry):
+    key = mesh_key(tmp_path, quad_geometry())
+    assert mesh_key(tmp_path, quad_geometry()) == key
+
+    moved = quad_geometry()
+    moved.unique_vertices = moved.unique_vertices + np.float32(0.5)
+    retyped = quad_geometry()
+    retyped.unique_vertices = retyped.unique_vertices.astype(np.float64)
+
+    changed = [
+        mesh_key(tmp_path, moved),
+        mesh_key(tmp_path, retyped),
+        mesh_key(tmp_path, quad_geometry(uv_rows=[np.zeros((4, 2), dtype=np.float32)])),
+        mesh_key(tmp_path, quad_geometry(), matrix=np.diag((2.0, 1.0, 1.0, 1.0))),
+        mesh_key(tmp_path, quad_geometry(), materials=[MaterialRecord("Mat", color=(1.0, 0.0, 0.0))]),
+        mesh_key(tmp_path, quad_geometry(), materials=[MaterialRecord("Mat"), None]),
+        mesh_key(tmp_path, quad_geometry(), EXPORT_MESH_UV=False),
+        mesh_key(tmp_path, quad_geometry(), DECIMAL_PRECISION=5),
+    ]
+    assert key not in changed
+    assert len(set(changed)) == len(changed)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_key_changes_with_the_writer_source(tmp_path, monkeypatch, quad_geometry):
+    key = mesh_key(tmp_path, quad_geometry())
+
+    edited = tmp_path / "ese_writer.py"
+    shutil.copy(ese_writer.__file__, edited)
+    with open(edited, 'a', encoding="utf8") as source:
+        source.write("\n# swy: an edit\n")
+    monkeypatch.setattr(ese_writer, '__file__', str(edited))
+
+    assert mesh_key(tmp_path, quad_geometry()) != key
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the dedup caches filled in while writing don't count, so a mesh keeps its key once it got written
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_key_skips_derived_slots(tmp_path, quad_geometry):
+    geometry = quad_geometry()
+    key = mesh_key(tmp_path, geometry)
+
+    geometry.unique_uvs([0], flip=True)
+    assert geometry.unique_layers
+    assert mesh_key(tmp_path, geometry) == key
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: within one cache a record is hashed once, by id(); a second record with the same contents still gets
+#      hashed on its own and ends up with the same key
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_key_memoizes_records_by_identity(tmp_path, quad_geometry):
+    cache = FragmentCache(str(tmp_path))
+    geometry = quad_geometry()
+    args = (geometry, np.eye(4), False, [MaterialRecord("Mat")])
+
+    key = cache.key(ese_writer.write_mesh, args, MESH_OPTIONS)
+    assert id(geometry) in cache.memo and len(cache.memo) == 2
+
+    copy = quad_geometry()
+    assert cache.key(ese_writer.write_mesh, (copy,) + args[1:], MESH_OPTIONS) == key
+    assert id(copy) in cache.memo and len(cache.memo) == 3
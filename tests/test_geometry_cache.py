@@ -0,0 +1,99 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+Linked duplicates and instances share their evaluated mesh, so the geometry cache has to extract it only
+once; objects with modifiers get their own entry. Needs Blender as a Python module (pip install bpy).
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+
+bpy = pytest.importorskip("bpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from io_scene_sphinx.eland_utils import GeometryCache, InstanceIndex
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def link(name, data=None):
+    ob = bpy.data.objects.new(name, data)
+    bpy.context.scene.collection.objects.link(ob)
+    return ob
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a cube, a linked duplicate of it, and a plane that instances the cube on each of its four vertices
+#-------------------------------------------------------------------------------------------------------------------------------
+@pytest.fixture
+def scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    bpy.ops.mesh.primitive_cube_add()
+    cube = bpy.context.object
+    duplicate = link("CubeLinked", cube.data)
+    duplicate.location = (3, 0, 0)
+
+    bpy.ops.mesh.primitive_plane_add(location=(0, 5, 0))
+    instancer = bpy.context.object
+    instancer.instance_type = 'VERTS'
+    instanced = link("CubeInstanced", cube.data)
+    instanced.parent = instancer
+
+    bpy.context.view_layer.update()
+    return cube, duplicate, instancer
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_duplicates_and_instances_share_one_entry(scene):
+    cube, duplicate, instancer = scene
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    cache = GeometryCache(depsgraph)
+
+    instances = InstanceIndex(depsgraph).instances(instancer)[1:]
+    assert len(instances) == 4
+
+    geometry = cache.get(cube)
+    assert cache.get(duplicate) is geometry
+    assert all(cache.get(ob) is geometry for ob, _ in instances)
+
+    assert (cache.misses, cache.hits) == (1, 5)
+    assert list(cache.entries) == [('MESH', cube.data.as_pointer())]
+    assert len(geometry.unique_vertices) == 8
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: with modifiers applied an object gets keyed by itself, without them only its mesh data counts
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_modifiers_key_by_object(scene):
+    cube, duplicate, _ = scene
+    duplicate.modifiers.new("Bevel", 'BEVEL')
+    bpy.context.view_layer.update()
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    cache = GeometryCache(depsgraph, apply_modifiers=True)
+    assert cache.key(cube) == ('MESH', cube.data.as_pointer())
+    assert cache.key(duplicate) == ('OBJECT', duplicate.as_pointer())
+    assert cache.get(duplicate) is not cache.get(cube)
+    assert (cache.misses, cache.hits) == (2, 0)
+
+    cache = GeometryCache(depsgraph, apply_modifiers=False)
+    assert cache.key(duplicate) == cache.key(cube) == ('MESH', cube.data.as_pointer())
+    assert cache.get(duplicate) is cache.get(cube)
+    assert (cache.misses, cache.hits) == (1, 1)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the flipped triangles read at extraction time are the ones Blender gives a flipped copy of the mesh
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_flipped_triangles_match_a_flipped_mesh():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    bpy.ops.mesh.primitive_monkey_add()
+    monkey = bpy.context.object
+
+    geometry = GeometryCache(bpy.context.evaluated_depsgraph_get()).get(monkey)
+
+    mesh = monkey.data.copy()
+    mesh.flip_normals()
+    mesh.calc_loop_triangles()
+    flipped = np.array([[mesh.loops[loop].vertex_index for loop in tri.loops] for tri in mesh.loop_triangles])
+    bpy.data.meshes.remove(mesh)
+
+    assert np.array_equal(geometry.loop_vertices[geometry.flipped_tri_loops], flipped)
@@ -0,0 +1,84 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+The low memory mode of the RTG exporter evaluates the meshes later on, one at a time; the file it writes has
+to be the very same one as the normal mode. Needs Blender as a Python module (pip install bpy).
+"""
+
+import os
+import sys
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import io_scene_sphinx
+
+#-------------------------------------------------------------------------------------------------------------------------------
+@pytest.fixture(scope="module", autouse=True)
+def addon():
+    io_scene_sphinx.register()
+    yield
+    io_scene_sphinx.unregister()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def link(name, data=None):
+    ob = bpy.data.objects.new(name, data)
+    bpy.context.scene.collection.objects.link(ob)
+    return ob
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a moving cube, a shape key that changes the mesh over time (so it matters which frame it gets read at)
+#      and a mesh that instances a curve without any splines, which comes out without geometry
+#-------------------------------------------------------------------------------------------------------------------------------
+def build_animated_scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+    scene.frame_start, scene.frame_end = 1, 12
+    scene.frame_set(3)
+
+    bpy.ops.mesh.primitive_cube_add()
+    cube = bpy.context.object
+    for frame, location in ((1, (0, 0, 0)), (12, (2, 1, 3))):
+        cube.location = location
+        cube.keyframe_insert("location", frame=frame)
+
+    bpy.ops.mesh.primitive_uv_sphere_add(segments=8, ring_count=5, location=(-2, 0, 0))
+    sphere = bpy.context.object
+    sphere.shape_key_add(name="Basis")
+    bulge = sphere.shape_key_add(name="Bulge")
+    for point in bulge.data:
+        point.co *= 1.5
+    for frame, value in ((1, 0.0), (12, 1.0)):
+        bulge.value = value
+        bulge.keyframe_insert("value", frame=frame)
+
+    bpy.ops.mesh.primitive_plane_add(location=(0, 4, 0))
+    instancer = bpy.context.object
+    instancer.instance_type = 'VERTS'
+    link("EmptyCurve", bpy.data.curves.new("EmptyCurve", 'CURVE')).parent = instancer
+
+    bpy.ops.object.select_all(action='DESELECT')
+    scene.frame_set(3)
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def export_rtg(filepath, low_memory):
+    result = bpy.ops.export_scene.rtg(
+        filepath=str(filepath),
+        Output_Mesh_Anims=True,
+        Output_CameraLightAnims=True,
+        Low_Memory=low_memory,
+    )
+    assert result == {'FINISHED'}
+    return filepath.read_bytes()
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_low_memory_matches_normal_export(tmp_path):
+    build_animated_scene()
+
+    normal = export_rtg(tmp_path / "normal.rtg", low_memory=False)
+    streamed = export_rtg(tmp_path / "streamed.rtg", low_memory=True)
+
+    assert bpy.context.scene.frame_current == 3
+    assert streamed == normal
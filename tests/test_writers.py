@@ -0,0 +1,204 @@
+#  Copyright (c) 2020-2021 Swyter <swyterzone+sphinx@gmail.com>
+#  SPDX-License-Identifier: Zlib
+
+"""
+The RTG and ESE writers on small hand-built scene models; plain CPython and NumPy, no Blender needed.
+"""
+
+import io
+import numpy as np
+from sphinx_standalone.eland_model import SceneModel, NodeRecord, MaterialRecord
+from sphinx_standalone.eland_parallel import SectionWriter
+from sphinx_standalone import rtg_writer, ese_writer
+
+#-------------------------------------------------------------------------------------------------------------------------------
+IDENTITY_ROWS = np.eye(3).ravel()
+
+RTG_OPTIONS = dict(
+    EXPORT_MATERIALS=True,
+    EXPORT_SCENE_FRAMES=True,
+    EXPORT_CAMERA_LIGHT_ANIMS=True,
+    EXPORT_MESH_UV=True,
+    EXPORT_MESH_VCOLORS=False,
+    DECIMAL_PRECISION=3,
+)
+
+ESE_OPTIONS = dict(
+    EXPORT_MATERIALS=True,
+    EXPORT_MESH_UV=True,
+    EXPORT_MESH_VCOLORS=False,
+    EXPORT_MESH_NORMALS=True,
+    EXPORT_MESH_FLAGS=False,
+    EXPORT_STATIC_FRAME=1,
+    DECIMAL_PRECISION=3,
+)
+
+RTG_EXPECTED = """EUROCOM_RTG 5.01
+*COMMENT "Version of Blender that output this file: 4.2.0"
+*COMMENT "Version of RTG Plug-in: 1.2.3"
+
+*MATERIAL {
+	*MATERIAL {
+		*NAME "Mat"
+		*COL_AMBIENT 1.000 1.000 1.000
+		*COL_DIFFUSE 1.000 0.000 0.000
+		*COL_SPECULAR 0.000 0.000 0.000
+		*COL_EMMISION 0.000
+		*SHININESS 0.000
+		*TRANSPARENCY 0.000
+		*MAP_DIFFUSE "//maps/brick wall.tga"
+	}
+}
+
+*SCENE_HIERARCHY {
+	Camera 1 CAMERA
+	My_Quad 1 MESH My QuadShape
+}
+
+*SCENE_FRAMES_PER_SECOND 30
+*SCENE_FRAME 1 {
+	Camera 1.000 0.000 0.000 0.000 1.000 0.000 0.000 0.000 1.000 0.000 -5.000 0.000
+	My_Quad 1.000 0.000 0.000 0.000 1.000 0.000 0.000 0.000 1.000 0.000 0.000 0.000
+}
+*SCENE_FRAME 2 {
+	My_Quad 1.000 0.000 0.000 0.000 1.000 0.000 0.000 0.000 1.000 0.000 0.000 1.000
+}
+*MESH {
+	*NAME My QuadShape
+	*VERT_XYXRGBA 4 {
+		0.000 0.000 -0.000
+		1.000 0.000 -0.000
+		1.000 1.000 -0.000
+		0.000 1.000 -0.000
+	}
+	*SHADER_0 {
+		1.000 0.000 0.000 1.000
+		brick_wall.tga "//maps/brick wall.tga" 1.000 0 0
+	}
+	*FACE_LIST {
+		*FACE 3 0 0 {
+			0 1 2
+			0.000000 -0.000000 1.000000 -0.000000 1.000000 -1.000000 brick_wall.tga
+		}
+		*FACE 3 0 0 {
+			0 2 3
+			0.000000 -0.000000 1.000000 -1.000000 0.000000 -1.000000 brick_wall.tga
+		}
+	}
+}
+*CAMERA_LIST {
+	Camera 0.500 0.500 35.000 0.100 100.000 1.000
+}
+*CAMERA_ANIMATION {
+	Camera focalLength 1 35.000 2 50.000 
+}
+"""
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: a moving quad and a camera that stays put but zooms in
+#-------------------------------------------------------------------------------------------------------------------------------
+def rtg_model(geometry):
+    model = SceneModel(frame_start=1, frame_end=2, fps=30, blender_version="4.2.0", plugin_version=(1, 2, 3))
+    model.materials["Mat"] = MaterialRecord("Mat", color=(1.0, 0.0, 0.0), texture="//maps/brick wall.tga")
+
+    quad = NodeRecord("My Quad", 'MESH', np.eye(4), geometry=geometry, materials=["Mat"])
+    quad.transforms['MESH'] = np.eye(4)
+    quad.transforms['FRAMES'] = np.array([np.r_[IDENTITY_ROWS, 0, 0, 0], np.r_[IDENTITY_ROWS, 0, 0, 1]])
+
+    camera = NodeRecord("Camera", 'CAMERA', np.eye(4), settings=(0.5, 35.0, 0.1, 100.0))
+    camera.transforms['FRAMES'] = np.array([np.r_[IDENTITY_ROWS, 0, -5, 0]])
+    camera.tracks['LENS'] = (np.array([1, 2]), np.array([(35.0,), (50.0,)]))
+
+    model.nodes = [quad, camera]
+    return model
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def ese_model(geometry, flip=False):
+    model = SceneModel(filepath="/tmp/quad.blend", frame_start=1, frame_end=2, fps=30, blender_version="4.2.0",
+                       plugin_version=(1, 2, 3))
+    model.materials["Mat"] = MaterialRecord("Mat", color=(1.0, 0.0, 0.0))
+    model.material_lists["My Quad"] = ["Mat"]
+    model.properties = [("level", "Numeric", 3)]
+
+    tm_values = np.r_[IDENTITY_ROWS, 0, 0, 0, 0, 0, 0, 1, 1, 1]
+    quad = NodeRecord("My Quad", 'MESH', np.eye(4), geometry=geometry, materials=["Mat"])
+    quad.transforms['NODE_TM'] = quad.transforms['PIVOT_TM'] = tm_values
+    quad.transforms['MESH'] = np.eye(4)
+    quad.transforms['TM_ANIMATION'] = np.array([np.r_[0, IDENTITY_ROWS, 0, 0, 0], np.r_[160, IDENTITY_ROWS, 0, 0, 1]])
+    quad.settings = {'flip': flip, 'wire_color': (0.5, 0.5, 0.5), 'morph_targets': [], 'skin': None}
+
+    helper = NodeRecord("Helper", 'EMPTY', np.eye(4), parent="My Quad")
+    helper.transforms['NODE_TM'] = tm_values
+
+    model.nodes = [quad, helper, NodeRecord("Bone", 'BONE', np.eye(4), parent="Root")]
+    return model
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def write_ese(model, out=None):
+    out = out or io.StringIO()
+    steps = list(ese_writer.write_steps(out, model, **ESE_OPTIONS))
+    return steps, out
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_rtg_writer_output(quad_geometry):
+    out = io.StringIO()
+    rtg_writer.write(out, rtg_model(quad_geometry()), **RTG_OPTIONS)
+    assert out.getvalue() == RTG_EXPECTED
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: the low memory mode hands over the geometry only when the mesh gets written
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_rtg_writer_streamed_geometry(quad_geometry):
+    geometry = quad_geometry()
+    model = rtg_model(None)
+
+    out = io.StringIO()
+    rtg_writer.write(out, model, **RTG_OPTIONS, geometry_of=lambda node: geometry)
+    assert out.getvalue() == RTG_EXPECTED
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_ese_writer_steps_and_blocks(quad_geometry):
+    steps, out = write_ese(ese_model(quad_geometry()))
+    text = out.getvalue()
+    lines = text.splitlines()
+
+    assert steps == [(1, 1)]
+    assert lines[0] == "*3DSMAX_EUROEXPORT\t300"
+    assert '\t\t*PROP\t0\t"level"\t"Numeric"\t"3"' in lines
+    assert '\t\t*MATERIAL_DIFFUSE 1.000 0.000 0.000' in lines
+    assert '\t*MATERIAL_REF 0' in lines
+    assert '\t\t\t*TM_FRAME  160   1.000 0.000 0.000 0.000 1.000 0.000 0.000 0.000 1.000 0.000 0.000 1.000' in lines
+    assert '\t\t\t*MESH_TFACE 1  \t0\t2\t3' in lines
+    assert [line for line in lines if line.startswith('\t\t\t*MESH_FACE ')] == [
+        '\t\t\t*MESH_FACE      0:    A:      0 B:      1 C:      2'
+        '    AB: 1      BC: 1      CA: 0       *MESH_SMOOTHING 0  *MESH_MTLID 0  ',
+        '\t\t\t*MESH_FACE      1:    A:      0 B:      2 C:      3'
+        '    AB: 0      BC: 1      CA: 1       *MESH_SMOOTHING 0  *MESH_MTLID 0  ',
+    ]
+
+    blocks = [line for line in lines if line.startswith('*') and line.endswith('{')]
+    assert blocks == ["*SCENE {", "*MATERIAL_LIST {", "*GEOMOBJECT {", "*HELPEROBJECT {", "*BONEOBJECT {"]
+    assert text.endswith('*BONEOBJECT {\n\t*NODE_NAME "Bone"\n\t*NODE_PARENT "Root"\n\t*NODE_BIPED_BODY\n}\n')
+
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_ese_writer_flipped_mesh(quad_geometry):
+    _, out = write_ese(ese_model(quad_geometry(), flip=True))
+    lines = out.getvalue().splitlines()
+
+    assert lines[lines.index('\t\t*MESH_FACE_LIST {') + 1].startswith('\t\t\t*MESH_FACE      0:    A:      0 B:      3 C:      2')
+    assert '\t\t\t*MESH_TVERT     1\t0.000\t1.000\t0.000' in lines
+    assert '\t\t\t*MESH_TFACE 0  \t0\t1\t2' in lines
+    assert '\t\t\t*MESH_FACENORMAL 0  \t-0.000\t0.000\t-1.000' in lines
+
+#-------------------------------------------------------------------------------------------------------------------------------
+# swy: going through a SectionWriter (without a pool or a cache) has to give the very same text; the
+#      second line holds the time of the export, leave it out
+#-------------------------------------------------------------------------------------------------------------------------------
+def test_ese_writer_through_a_section_writer(quad_geometry):
+    _, direct = write_ese(ese_model(quad_geometry()))
+
+    out = io.StringIO()
+    with SectionWriter(out) as sections:
+        write_ese(ese_model(quad_geometry()), sections)
+
+    assert out.getvalue().splitlines()[2:] == direct.getvalue().splitlines()[2:]